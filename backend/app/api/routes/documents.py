@@ -1,19 +1,30 @@
 """Document-related API routes."""
+import json
+import asyncio
+import hashlib
 from pathlib import Path
-from fastapi import APIRouter, UploadFile, File, Depends, status, HTTPException
-from typing import List
+from fastapi import APIRouter, Request, UploadFile, File, Depends, Query, status, HTTPException
+from typing import List, Literal, Optional
 
 from app.schemas.documents import SummaryResponse, HistoryItem
 from app.core.dependencies import (
     get_pdf_parser,
-    get_openai_service,
-    get_storage_service
+    get_optional_openai_service,
+    get_extractive_summarizer,
+    get_storage_service,
+    get_single_flight_service,
+    get_admission_controller,
+    get_cpu_scheduler
 )
-from app.core.exceptions import FileValidationError, PDFParseError, DocumentProcessingError
+from app.core.exceptions import FileValidationError, PDFParseError, DocumentProcessingError, ServiceUnavailableError
 from app.core.constants import ALLOWED_FILE_EXTENSIONS, MIN_TEXT_LENGTH, ERROR_FILE_NOT_PDF, ERROR_FILE_TOO_LARGE, ERROR_NO_TEXT_EXTRACTED
 from app.services.pdf_parser import PDFParser
 from app.services.openai_service import OpenAIService
+from app.services.extractive_summarizer import ExtractiveSummarizer
 from app.services.storage import StorageService
+from app.services.single_flight import SingleFlightService
+from app.services.admission import AdmissionController, client_identity, estimate_upload_cost
+from app.services.scheduler import JobScheduler, estimate_job_costs
 from app.core.config import settings
 
 router = APIRouter(prefix="/api/v1", tags=["documents"])
@@ -21,22 +32,43 @@ router = APIRouter(prefix="/api/v1", tags=["documents"])
 
 @router.post("/upload", response_model=SummaryResponse, status_code=status.HTTP_201_CREATED)
 async def upload_pdf(
+    request: Request,
     file: UploadFile = File(...),
+    mode: Literal["llm", "extractive"] = Query("llm", description="llm for an AI summary, extractive for a fast local summary"),
     pdf_parser: PDFParser = Depends(get_pdf_parser),
-    openai_service: OpenAIService = Depends(get_openai_service),
+    openai_service: Optional[OpenAIService] = Depends(get_optional_openai_service),
+    extractive_summarizer: ExtractiveSummarizer = Depends(get_extractive_summarizer),
     storage_service: StorageService = Depends(get_storage_service),
+    single_flight: SingleFlightService = Depends(get_single_flight_service),
+    admission: AdmissionController = Depends(get_admission_controller),
+    cpu_scheduler: JobScheduler = Depends(get_cpu_scheduler),
 ):
     """
     Upload a PDF file and generate AI summary.
+    In llm mode pages are streamed from the parser into the summarizer, so
+    chunk summaries are requested while later pages are still being parsed.
+    Concurrent uploads of the same file with the same model share a single
+    parse + summarize run. Work is admitted by estimated cost; under overload
+    requests are queued and then shed with 503 + Retry-After. Parsing and
+    OpenAI calls are scheduled cheapest document first. When the OpenAI API
+    is unavailable, falls back to a local extractive summary (if enabled);
+    summary_mode in the response tells which one was produced. llm mode
+    without a configured API key is rejected with 503.
     
     Args:
+        request: Incoming request (client address, or X-Forwarded-For from a trusted proxy)
         file: PDF file to upload (max 50MB, up to 100 pages)
+        mode: Summary mode (llm or extractive)
         pdf_parser: PDF parser service (injected)
-        openai_service: OpenAI service (injected)
+        openai_service: OpenAI service (injected, None if not configured)
+        extractive_summarizer: Local extractive summarizer (injected)
         storage_service: Storage service (injected)
+        single_flight: Single-flight coalescing service (injected)
+        admission: Admission controller limiting concurrent work (injected)
+        cpu_scheduler: Shortest-job-first scheduler for parsing (injected)
     
     Returns:
-        SummaryResponse with filename, summary, and upload timestamp
+        SummaryResponse with filename, summary, summary mode, and upload timestamp
     """
     if not file.filename:
         raise FileValidationError(ERROR_FILE_NOT_PDF)
@@ -45,6 +77,24 @@ async def upload_pdf(
     if file_ext not in ALLOWED_FILE_EXTENSIONS:
         raise FileValidationError(ERROR_FILE_NOT_PDF)
     
+    # Shed load before pulling the upload into memory
+    client_id = client_identity(
+        request.client.host if request.client else None,
+        request.headers.get("x-forwarded-for")
+    )
+    if admission.is_saturated((file.size or 0) / (1024 * 1024)):
+        raise ServiceUnavailableError(
+            "Server is busy processing other documents. Please try again later.",
+            retry_after=admission.retry_after
+        )
+    admission.check_client(client_id)
+    
+    if mode == "llm" and openai_service is None:
+        # A missing key is a configuration problem, not an outage: never fall back silently
+        raise ServiceUnavailableError(
+            "OpenAI is not configured (OPENAI_API_KEY is not set). Use mode=extractive for a local summary."
+        )
+    
     file_content = await file.read()
     file_size_mb = len(file_content) / (1024 * 1024)
     
@@ -54,28 +104,116 @@ async def upload_pdf(
     if file_size_mb > settings.max_file_size_mb:
         raise FileValidationError(ERROR_FILE_TOO_LARGE.format(max_size=settings.max_file_size_mb))
     
-    try:
-        text_content = await pdf_parser.parse_pdf(file_content)
-        
+    async def summarize() -> str:
+        # Admitted by size first, so estimating the workload is within the budget too
+        provisional_cost = estimate_upload_cost(len(file_content), 1, False)
+        async with admission.admit(client_id, provisional_cost, size_mb=file_size_mb) as ticket:
+            page_count, needs_ocr, estimated_tokens = await asyncio.to_thread(
+                pdf_parser.estimate_workload, file_content
+            )
+            await ticket.resize(estimate_upload_cost(len(file_content), page_count, needs_ocr))
+            # Cheap documents go ahead of expensive ones for CPU and OpenAI calls
+            cpu_cost, api_cost = estimate_job_costs(page_count, needs_ocr, estimated_tokens)
+            
+            if mode == "extractive":
+                return encode_result(await summarize_extractive(await parse_text(cpu_cost), cpu_cost), "extractive")
+            
+            if not settings.extractive_prepass_ratio:
+                # Streamed blocks are kept (up to a cap) so a fallback does not parse (and OCR) the PDF again
+                streamed_blocks = [] if settings.extractive_fallback_enabled else None
+                pages = checked_pages(cpu_cost, streamed_blocks)
+                try:
+                    # Chunks go to the map stage while later pages are still being parsed
+                    return encode_result(await openai_service.generate_summary_stream(pages, job_cost=api_cost), "llm")
+                except ServiceUnavailableError:
+                    if streamed_blocks is None:
+                        raise
+                    if streamed_blocks:
+                        # Finish parsing whatever the summarizer had not read yet
+                        async for _ in pages:
+                            pass
+                    if not streamed_blocks:
+                        # Nothing was read yet, or the document outgrew the cap: parse it again
+                        await pages.aclose()
+                        return encode_result(
+                            await summarize_extractive(await parse_text(cpu_cost), cpu_cost), "extractive"
+                        )
+                    return encode_result(
+                        await summarize_extractive("\n".join(streamed_blocks), cpu_cost), "extractive"
+                    )
+                finally:
+                    await pages.aclose()
+            
+            text_content = await parse_text(cpu_cost)
+            try:
+                async with cpu_scheduler.slot(cpu_cost):
+                    llm_input = await asyncio.to_thread(
+                        extractive_summarizer.condense, text_content, settings.extractive_prepass_ratio
+                    )
+                return encode_result(await openai_service.generate_summary(llm_input, job_cost=api_cost), "llm")
+            except ServiceUnavailableError:
+                if not settings.extractive_fallback_enabled:
+                    raise
+                return encode_result(await summarize_extractive(text_content, cpu_cost), "extractive")
+    
+    async def parse_text(cpu_cost: float) -> str:
+        async with cpu_scheduler.slot(cpu_cost):
+            text_content = await asyncio.to_thread(lambda: "\n".join(pdf_parser.iter_pages(file_content)))
         if not text_content or len(text_content.strip()) < MIN_TEXT_LENGTH:
             raise PDFParseError(ERROR_NO_TEXT_EXTRACTED)
-        
-        summary = await openai_service.generate_summary(text_content)
+        return text_content
+    
+    async def checked_pages(cpu_cost: float, blocks: Optional[List[str]]):
+        text_length = kept_length = 0
+        async for block in pdf_parser.stream_pages(file_content, scheduler=cpu_scheduler, cost=cpu_cost):
+            text_length += len(block.strip())
+            if blocks is not None:
+                kept_length += len(block)
+                if kept_length <= settings.extractive_fallback_max_chars:
+                    blocks.append(block)
+                else:
+                    # Past the cap the blocks are dropped, not held for the whole request
+                    blocks.clear()
+                    blocks = None
+            yield block
+        if text_length < MIN_TEXT_LENGTH:
+            raise PDFParseError(ERROR_NO_TEXT_EXTRACTED)
+    
+    async def summarize_extractive(text_content: str, cpu_cost: float) -> str:
+        async with cpu_scheduler.slot(cpu_cost):
+            return await asyncio.to_thread(extractive_summarizer.summarize, text_content)
+    
+    def encode_result(summary: str, summary_mode: str) -> str:
+        # Single-flight shares results as text, so the mode travels with the summary
+        return json.dumps({"summary": summary, "summary_mode": summary_mode})
+    
+    content_hash = hashlib.sha256(file_content).hexdigest()
+    summary_key = "extractive" if mode == "extractive" else settings.openai_model
+    
+    try:
+        result = json.loads(await single_flight.run(
+            f"{content_hash}:{summary_key}",
+            summarize,
+            # A fallback summary must not be served to llm uploads once OpenAI is back
+            shareable=lambda encoded: json.loads(encoded)["summary_mode"] == mode
+        ))
         
         history_item = await storage_service.add_to_history(
             filename=file.filename,
-            summary=summary,
+            summary=result["summary"],
             file_size=file_size_mb,
-            file_content=file_content if settings.save_pdf_files else None
+            file_content=file_content if settings.save_pdf_files else None,
+            summary_mode=result["summary_mode"]
         )
         
         return SummaryResponse(
             filename=file.filename,
-            summary=summary,
+            summary=history_item.summary,
+            summary_mode=history_item.summary_mode,
             uploaded_at=history_item.uploaded_at
         )
     
-    except (FileValidationError, PDFParseError):
+    except (FileValidationError, PDFParseError, ServiceUnavailableError):
         raise
     except Exception as e:
         raise DocumentProcessingError(f"Error processing PDF: {str(e)}")
@@ -1,5 +1,11 @@
 """Health check and system information routes."""
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+
+from app.core.dependencies import startup_state, get_optional_openai_service, get_cpu_scheduler
+from app.services.openai_service import OpenAIService
+from app.services.scheduler import JobScheduler
 
 router = APIRouter(tags=["health"])
 
@@ -17,6 +23,58 @@ async def health_check():
     }
 
 
+@router.get("/ready")
+async def readiness_check():
+    """
+    Readiness endpoint.
+    
+    Returns 200 once services are warmed up (database initialized, tiktoken
+    loaded if OpenAI is configured), 503 otherwise. OpenAI is not required: if it is not
+    configured the app is ready for extractive summaries and the problem is
+    listed under warnings. Startup timings are included so cold start can
+    be tracked.
+    """
+    return JSONResponse(
+        status_code=200 if startup_state["ready"] else 503,
+        content={
+            "status": "ready" if startup_state["ready"] else "not_ready",
+            **startup_state
+        }
+    )
+
+
+@router.get("/metrics/llm")
+async def llm_metrics(
+    openai_service: Optional[OpenAIService] = Depends(get_optional_openai_service),
+):
+    """
+    OpenAI transport metrics.
+    
+    Returns call, error, timeout and hedge counts plus p50/p95/p99 latencies
+    for map (chunk) and reduce (final summary) calls in this worker.
+    """
+    if openai_service is None:
+        return {}
+    return openai_service.metrics.snapshot()
+
+
+@router.get("/metrics/scheduler")
+async def scheduler_metrics(
+    cpu_scheduler: JobScheduler = Depends(get_cpu_scheduler),
+    openai_service: Optional[OpenAIService] = Depends(get_optional_openai_service),
+):
+    """
+    Size-aware scheduler metrics.
+    
+    Returns slot usage, queue length and queue-wait p50/p95/p99 for small
+    and large jobs, for CPU work (parsing) and OpenAI calls in this worker.
+    """
+    metrics = {"cpu": cpu_scheduler.snapshot()}
+    if openai_service is not None:
+        metrics["api"] = openai_service.scheduler.snapshot()
+    return metrics
+
+
 @router.get("/")
 async def root():
     """
@@ -9,17 +9,86 @@ class Settings(BaseSettings):
     # OpenAI settings
     openai_api_key: str = ""
     openai_model: str = "gpt-4o-mini"
+    openai_base_url: str = ""  # empty for the default OpenAI endpoint
+    openai_max_retries: int = 5
+    openai_retry_base_delay_seconds: float = 1.0
+    openai_retry_max_delay_seconds: float = 60.0
+    openai_circuit_failure_threshold: int = 5
+    openai_circuit_reset_seconds: float = 30.0
+    openai_map_concurrency: int = 4  # API calls in flight per worker, shared by all documents
+    
+    # OpenAI transport settings (connection pool, timeouts, hedging)
+    openai_max_connections: int = 20
+    openai_max_keepalive_connections: int = 10
+    openai_keepalive_expiry_seconds: float = 30.0
+    openai_http2: bool = True
+    openai_connect_timeout_seconds: float = 5.0
+    openai_map_read_timeout_seconds: float = 60.0
+    openai_reduce_read_timeout_seconds: float = 120.0
+    openai_hedge_enabled: bool = False
+    openai_hedge_min_samples: int = 20  # map latencies needed before hedging starts
+    openai_hedge_min_delay_seconds: float = 1.0
     
     # Storage settings
     save_pdf_files: bool = False
     db_path: str = "documents.db"
     storage_dir: str = "uploads"
     max_history: int = 5
+    chunk_cache_enabled: bool = True
+    chunk_cache_max_mb: float = 50
     
     # File upload settings
     max_file_size_mb: int = 50
     max_pages: int = 100
     
+    # PDF parsing settings
+    table_strategy: str = "lines"  # lines, lines_strict, text or none
+    table_format: str = "markdown"  # markdown or csv
+    ocr_mode: str = "fallback"  # fallback (only without a text layer) or images (always OCR embedded images)
+    ocr_page_dpi: int = 200  # for pages without embedded images
+    ocr_min_dpi: int = 150
+    ocr_max_dpi: int = 300
+    ocr_page_image_ratio: float = 0.5  # images covering this share of a page (scans) are rendered at ocr_page_dpi at most
+    ocr_min_image_size_pt: float = 36
+    ocr_binarize: bool = True
+    parse_queue_pages: int = 8  # text blocks parsed ahead of the summarizer when streaming
+    
+    # Size-aware scheduling (shortest job first with aging, per worker)
+    scheduler_cpu_workers: int = 4
+    scheduler_cpu_aging_per_second: float = 2.0  # pages of cost forgiven per second waited
+    scheduler_api_aging_per_second: float = 0.2  # API calls of cost forgiven per second waited
+    scheduler_cpu_small_job_cost: float = 10
+    scheduler_api_small_job_cost: float = 2
+    
+    # Admission control settings (per worker)
+    admission_max_cost: float = 400  # ~1 unit per MB + 1 per page
+    admission_ocr_page_cost: float = 4
+    admission_max_queue: int = 20
+    admission_max_queued_mb: float = 200  # uploads waiting in the queue are already in memory
+    admission_max_per_client: int = 3
+    admission_queue_timeout_seconds: float = 120
+    admission_retry_after_seconds: float = 30
+    # Proxies whose X-Forwarded-For is trusted to identify the client (e.g. the Next.js server)
+    admission_trusted_proxies: List[str] = ["127.0.0.1", "::1"]
+    
+    # Extractive summarization settings
+    extractive_summary_sentences: int = 12
+    extractive_max_candidates: int = 1500
+    extractive_fallback_enabled: bool = True  # use when OpenAI is unavailable
+    extractive_fallback_max_chars: int = 2_000_000  # streamed text kept for the fallback; longer documents are parsed again
+    extractive_prepass_ratio: float = 0.0  # 0 disables shrinking text before the LLM
+    
+    # Bulk (Batch API) settings
+    batch_poll_interval_seconds: float = 60
+    batch_max_requests: int = 50000
+    batch_max_file_mb: float = 190  # Batch API input files are capped at 200 MB
+    batch_group_documents: int = 500  # documents parsed and held in memory at a time
+    
+    # Upload coalescing settings
+    single_flight_lock_ttl_seconds: float = 600
+    single_flight_poll_interval_seconds: float = 0.5
+    single_flight_result_ttl_seconds: float = 60
+    
     # CORS settings
     cors_origins: List[str] = ["*"]
     
@@ -1,29 +1,160 @@
 """Dependency injection for services."""
+import time
+from typing import Optional, Dict, Any
+
 from app.services.pdf_parser import PDFParser
 from app.services.openai_service import OpenAIService
 from app.services.storage import StorageService
+from app.services.single_flight import SingleFlightService
+from app.services.summary_cache import SummaryCache
+from app.services.extractive_summarizer import ExtractiveSummarizer
+from app.services.admission import AdmissionController
+from app.services.scheduler import JobScheduler
 from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableError
+
 
+# Service instances (singletons, created lazily on first use or during warm-up)
+_pdf_parser: Optional[PDFParser] = None
+_openai_service: Optional[OpenAIService] = None
+_storage_service: Optional[StorageService] = None
+_single_flight_service: Optional[SingleFlightService] = None
+_extractive_summarizer: Optional[ExtractiveSummarizer] = None
+_admission_controller: Optional[AdmissionController] = None
+_cpu_scheduler: Optional[JobScheduler] = None
 
-# Service instances (singletons)
-pdf_parser = PDFParser()
-openai_service = OpenAIService()
-storage_service = StorageService(
-    db_path=settings.db_path,
-    storage_dir=settings.storage_dir
-)
+# Startup state reported by the readiness endpoint
+startup_state: Dict[str, Any] = {
+    "ready": False,
+    "import_seconds": None,
+    "warm_up_seconds": None,
+    "time_to_ready_seconds": None,
+    "errors": {},
+    "warnings": {},
+}
 
 
 def get_pdf_parser() -> PDFParser:
     """Get PDF parser service."""
-    return pdf_parser
+    global _pdf_parser
+    if _pdf_parser is None:
+        _pdf_parser = PDFParser()
+    return _pdf_parser
 
 
 def get_openai_service() -> OpenAIService:
     """Get OpenAI service."""
-    return openai_service
+    global _openai_service
+    if _openai_service is None:
+        try:
+            summary_cache = SummaryCache(db_path=settings.db_path) if settings.chunk_cache_enabled else None
+            _openai_service = OpenAIService(summary_cache=summary_cache)
+        except ValueError as e:
+            raise ServiceUnavailableError(str(e))
+    return _openai_service
+
+
+def get_optional_openai_service() -> Optional[OpenAIService]:
+    """Get OpenAI service, or None if it is not configured."""
+    try:
+        return get_openai_service()
+    except ServiceUnavailableError:
+        return None
+
+
+def get_extractive_summarizer() -> ExtractiveSummarizer:
+    """Get local extractive summarizer."""
+    global _extractive_summarizer
+    if _extractive_summarizer is None:
+        _extractive_summarizer = ExtractiveSummarizer()
+    return _extractive_summarizer
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get admission controller for the upload pipeline."""
+    global _admission_controller
+    if _admission_controller is None:
+        _admission_controller = AdmissionController()
+    return _admission_controller
+
+
+def get_cpu_scheduler() -> JobScheduler:
+    """Get scheduler for CPU-bound parsing and extractive summarization."""
+    global _cpu_scheduler
+    if _cpu_scheduler is None:
+        _cpu_scheduler = JobScheduler(
+            name="cpu",
+            capacity=settings.scheduler_cpu_workers,
+            aging_per_second=settings.scheduler_cpu_aging_per_second,
+            small_job_cost=settings.scheduler_cpu_small_job_cost
+        )
+    return _cpu_scheduler
+
+
+async def get_storage_service() -> StorageService:
+    """Get storage service (database schema is initialized on first use)."""
+    global _storage_service
+    if _storage_service is None:
+        _storage_service = StorageService(
+            db_path=settings.db_path,
+            storage_dir=settings.storage_dir
+        )
+    await _storage_service.initialize()
+    return _storage_service
+
+
+async def get_single_flight_service() -> SingleFlightService:
+    """Get single-flight service used to coalesce identical uploads (tables are created on first use)."""
+    global _single_flight_service
+    if _single_flight_service is None:
+        _single_flight_service = SingleFlightService(db_path=settings.db_path)
+    return _single_flight_service
+
+
+async def warm_up_services(started_at: float):
+    """
+    Construct services and pre-load expensive resources before serving traffic.
+    Failures are recorded per service instead of aborting startup, so the app
+    still comes up and the readiness endpoint can report what is missing.
+    OpenAI is optional for readiness: without it extractive mode still works,
+    so its problems are reported as warnings.
+
+    Args:
+        started_at: perf_counter() value taken when the app started importing
+    """
+    warm_up_started = time.perf_counter()
+    errors = {}
+    warnings = {}
+
+    get_pdf_parser()
+    get_extractive_summarizer()
+    get_cpu_scheduler()
+
+    try:
+        await get_storage_service()
+        await (await get_single_flight_service()).initialize()
+    except Exception as e:
+        errors["storage"] = str(e)
+
+    try:
+        await get_openai_service().warm_up()
+    except ServiceUnavailableError as e:
+        warnings["openai"] = e.detail
+    except Exception as e:
+        warnings["openai"] = str(e)
+
+    now = time.perf_counter()
+    startup_state["warm_up_seconds"] = round(now - warm_up_started, 4)
+    startup_state["time_to_ready_seconds"] = round(now - started_at, 4)
+    startup_state["errors"] = errors
+    startup_state["warnings"] = warnings
+    startup_state["ready"] = not errors
 
 
-def get_storage_service() -> StorageService:
-    """Get storage service."""
-    return storage_service
+async def shutdown_services():
+    """Release resources held by services."""
+    global _openai_service
+    startup_state["ready"] = False
+    if _openai_service is not None:
+        await _openai_service.close()
+        _openai_service = None
@@ -1,4 +1,5 @@
 """Custom exceptions for the application."""
+from typing import Optional
 from fastapi import HTTPException, status
 
 
@@ -29,3 +30,11 @@ class FileValidationError(HTTPException):
         )
 
 
+class ServiceUnavailableError(HTTPException):
+    """Exception raised when a required service is not available."""
+    def __init__(self, detail: str = "Service is not available", retry_after: Optional[float] = None):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(max(int(retry_after + 0.5), 1))} if retry_after is not None else None
+        )
@@ -13,6 +13,7 @@ class Document(BaseModel):
     filename: str = Field(..., description="Original filename of the uploaded PDF")
     file_path: Optional[str] = Field(None, description="Path to saved PDF file (if saved)")
     summary: str = Field(..., description="AI-generated summary of the document")
+    summary_mode: str = Field("llm", description="How the summary was produced (llm or extractive)")
     file_size_mb: float = Field(..., description="File size in megabytes")
     uploaded_at: datetime = Field(..., description="Timestamp when the document was uploaded")
     
@@ -25,6 +26,7 @@ class Document(BaseModel):
                 "filename": "document.pdf",
                 "file_path": "uploads/550e8400-e29b-41d4-a716-446655440000_document.pdf",
                 "summary": "This document discusses...",
+                "summary_mode": "llm",
                 "file_size_mb": 2.5,
                 "uploaded_at": "2024-01-01T12:00:00"
             }
@@ -1,12 +1,16 @@
 """Pydantic schemas for document-related API endpoints."""
 from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import Literal
 
 
 class SummaryResponse(BaseModel):
     """Response schema for PDF upload and summary generation."""
     filename: str = Field(..., description="Original filename of the uploaded PDF")
-    summary: str = Field(..., description="AI-generated summary of the document")
+    summary: str = Field(..., description="Summary of the document")
+    summary_mode: Literal["llm", "extractive"] = Field(
+        ..., description="llm for an AI summary, extractive for key sentences picked locally"
+    )
     uploaded_at: datetime = Field(..., description="Timestamp when the document was uploaded")
     
     class Config:
@@ -14,6 +18,7 @@ class SummaryResponse(BaseModel):
             "example": {
                 "filename": "document.pdf",
                 "summary": "This document discusses...",
+                "summary_mode": "llm",
                 "uploaded_at": "2024-01-01T12:00:00"
             }
         }
@@ -24,6 +29,7 @@ class HistoryItem(BaseModel):
     id: str = Field(..., description="Document ID")
     filename: str = Field(..., description="Filename of the processed document")
     summary: str = Field(..., description="Generated summary")
+    summary_mode: Literal["llm", "extractive"] = Field("llm", description="How the summary was produced")
     uploaded_at: datetime = Field(..., description="Upload timestamp")
     file_size_mb: float = Field(..., description="File size in megabytes")
     
@@ -32,6 +38,7 @@ class HistoryItem(BaseModel):
             "example": {
                 "filename": "document.pdf",
                 "summary": "Summary text...",
+                "summary_mode": "llm",
                 "uploaded_at": "2024-01-01T12:00:00",
                 "file_size_mb": 2.5
             }
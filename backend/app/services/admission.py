@@ -0,0 +1,244 @@
+import asyncio
+import ipaddress
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Iterable, Optional, Tuple
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableError
+
+
+def estimate_upload_cost(size_bytes: int, page_count: int, needs_ocr: bool) -> float:
+    """
+    Estimate the cost of processing an upload in abstract units.
+    Roughly: one unit per MB held in memory, one per page parsed, and
+    ocr_page_cost per page that has to be rendered and OCRed.
+
+    Args:
+        size_bytes: PDF size in bytes
+        page_count: Number of pages
+        needs_ocr: Whether the PDF has no text layer and will be OCRed
+
+    Returns:
+        Estimated cost
+    """
+    cost = size_bytes / (1024 * 1024) + page_count
+    if needs_ocr:
+        cost += page_count * settings.admission_ocr_page_cost
+    return max(cost, 1.0)
+
+
+def client_identity(peer: Optional[str], forwarded_for: Optional[str], trusted_proxies: Iterable[str] = None) -> str:
+    """
+    Identify the client behind a request for per-client limits.
+    X-Forwarded-For is only honoured when the connection comes from a trusted
+    proxy; it is read right to left, skipping addresses of trusted proxies, so
+    a client cannot pick its identity by sending the header itself.
+
+    Args:
+        peer: Address of the direct connection (None if unknown)
+        forwarded_for: X-Forwarded-For header value, if any
+        trusted_proxies: Proxy addresses or networks in CIDR form (defaults to settings)
+
+    Returns:
+        Client address
+    """
+    networks = [
+        ipaddress.ip_network(proxy, strict=False)
+        for proxy in (settings.admission_trusted_proxies if trusted_proxies is None else trusted_proxies)
+    ]
+
+    def is_trusted(address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in networks)
+
+    if peer is None:
+        return "unknown"
+    if not forwarded_for or not is_trusted(peer):
+        return peer
+
+    addresses = [address.strip() for address in forwarded_for.split(",") if address.strip()]
+    for address in reversed(addresses):
+        if not is_trusted(address):
+            return address
+    return addresses[0] if addresses else peer
+
+
+class AdmissionTicket:
+    """Capacity held by one admitted unit of work (see AdmissionController.admit)."""
+
+    def __init__(self, controller: "AdmissionController", cost: float, size_mb: float):
+        self.controller = controller
+        self.cost = cost
+        self.size_mb = size_mb
+
+    async def resize(self, cost: float):
+        """
+        Replace the estimated cost, e.g. after inspecting the document.
+
+        Args:
+            cost: New estimated cost
+
+        Raises:
+            ServiceUnavailableError: If the larger cost has to wait and is shed
+        """
+        await self.controller._resize(self, cost)
+
+
+class AdmissionController:
+    """
+    Cost-based admission control for the upload pipeline (per worker process).
+    Work runs while the total estimated cost in flight fits in max_cost. Further
+    requests wait in a bounded FIFO queue; beyond that, or after waiting too
+    long, they are shed with 503 + Retry-After. Queued uploads already hold
+    their file in memory, so the queue is also bounded by total MB. Each
+    client may only have a limited number of requests queued or running.
+    """
+
+    def __init__(
+        self,
+        max_cost: float = None,
+        max_queue: int = None,
+        max_queued_mb: float = None,
+        max_per_client: int = None,
+        queue_timeout: float = None,
+        retry_after: float = None
+    ):
+        self.max_cost = max_cost or settings.admission_max_cost
+        self.max_queue = max_queue if max_queue is not None else settings.admission_max_queue
+        self.max_queued_mb = max_queued_mb or settings.admission_max_queued_mb
+        self.max_per_client = max_per_client or settings.admission_max_per_client
+        self.queue_timeout = queue_timeout or settings.admission_queue_timeout_seconds
+        self.retry_after = retry_after or settings.admission_retry_after_seconds
+        self.in_flight_cost = 0.0
+        self.queued_mb = 0.0
+        self._per_client: Dict[str, int] = {}
+        # Queued work as (cost, size in MB, waiter)
+        self._waiters: Deque[Tuple[float, float, asyncio.Future]] = deque()
+
+    def is_saturated(self, size_mb: float = 0.0) -> bool:
+        """
+        Check whether new work would be shed right away (queue is full).
+
+        Args:
+            size_mb: Size of the upload that would wait in the queue
+        """
+        if len(self._waiters) >= self.max_queue:
+            return True
+        # The first waiter is always let in, however large
+        return bool(self._waiters) and self.queued_mb + size_mb > self.max_queued_mb
+
+    def check_client(self, client_id: str):
+        """
+        Reject a client that already has its maximum of requests in the pipeline.
+
+        Raises:
+            ServiceUnavailableError: If the client is over its limit
+        """
+        if self._per_client.get(client_id, 0) >= self.max_per_client:
+            raise ServiceUnavailableError(
+                "Too many uploads in progress for this client. Please try again later.",
+                retry_after=self.retry_after
+            )
+
+    @asynccontextmanager
+    async def admit(self, client_id: str, cost: float, size_mb: float = 0.0):
+        """
+        Hold capacity for a unit of work while the context is active.
+
+        Args:
+            client_id: Client identifier for per-client limits
+            cost: Estimated cost (see estimate_upload_cost); may be revised
+                with resize() once the work is better known
+            size_mb: Memory held by the work while it waits (upload size)
+
+        Yields:
+            AdmissionTicket for the held capacity
+
+        Raises:
+            ServiceUnavailableError: If the work is shed
+        """
+        self.check_client(client_id)
+        ticket = AdmissionTicket(self, min(cost, self.max_cost), size_mb)
+        self._per_client[client_id] = self._per_client.get(client_id, 0) + 1
+        try:
+            await self._acquire(ticket.cost, size_mb)
+            try:
+                yield ticket
+            finally:
+                self._release(ticket.cost)
+        finally:
+            self._per_client[client_id] -= 1
+            if not self._per_client[client_id]:
+                del self._per_client[client_id]
+
+    async def _resize(self, ticket: "AdmissionTicket", cost: float):
+        """Change the capacity held by a ticket, waiting in the queue if it grows past the budget"""
+        # A job bigger than the whole budget may still run, just alone
+        cost = min(cost, self.max_cost)
+        if cost <= ticket.cost:
+            self._release(ticket.cost - cost)
+            ticket.cost = cost
+            return
+        if not self._waiters and self.in_flight_cost - ticket.cost + cost <= self.max_cost:
+            self.in_flight_cost += cost - ticket.cost
+            ticket.cost = cost
+            return
+        # Give back what is held before waiting, so holders never wait on each other
+        self._release(ticket.cost)
+        ticket.cost = 0.0
+        await self._acquire(cost, ticket.size_mb)
+        ticket.cost = cost
+
+    async def _acquire(self, cost: float, size_mb: float):
+        """Take capacity now, or wait in the queue for it"""
+        if not self._waiters and self.in_flight_cost + cost <= self.max_cost:
+            self.in_flight_cost += cost
+            return
+
+        if self.is_saturated(size_mb):
+            raise ServiceUnavailableError(
+                "Server is busy processing other documents. Please try again later.",
+                retry_after=self.retry_after
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (cost, size_mb, waiter)
+        self._waiters.append(entry)
+        self.queued_mb += size_mb
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Capacity was granted just as we gave up; hand it back
+                self._release(cost)
+            else:
+                waiter.cancel()
+                self._waiters.remove(entry)
+                self.queued_mb = max(self.queued_mb - size_mb, 0.0)
+                # A cancelled head of the queue may have blocked smaller jobs
+                self._wake_waiters()
+            if isinstance(e, asyncio.TimeoutError):
+                raise ServiceUnavailableError(
+                    "Server is busy processing other documents. Please try again later.",
+                    retry_after=self.retry_after
+                )
+            raise
+
+    def _release(self, cost: float):
+        """Return capacity and wake queued work that now fits (FIFO)"""
+        self.in_flight_cost = max(self.in_flight_cost - cost, 0.0)
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        """Grant capacity to waiters at the head of the queue while they fit"""
+        while self._waiters:
+            cost, size_mb, waiter = self._waiters[0]
+            if self.in_flight_cost + cost > self.max_cost and self.in_flight_cost > 0:
+                break
+            self._waiters.popleft()
+            self.queued_mb = max(self.queued_mb - size_mb, 0.0)
+            self.in_flight_cost += cost
+            waiter.set_result(None)
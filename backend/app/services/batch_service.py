@@ -0,0 +1,340 @@
+import json
+import asyncio
+import hashlib
+import logging
+import aiosqlite
+from pathlib import Path
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.core.constants import MIN_TEXT_LENGTH, ERROR_NO_TEXT_EXTRACTED
+from app.services.pdf_parser import PDFParser
+from app.services.openai_service import (
+    OpenAIService,
+    CHUNK_PROMPT_VERSION,
+    CHUNK_SUMMARY_MAX_TOKENS,
+    FINAL_SUMMARY_MAX_TOKENS
+)
+from app.services.summary_cache import SummaryCache
+from app.services.storage import StorageService
+
+# Batch statuses after which polling stops
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+logger = logging.getLogger(__name__)
+
+
+class BulkDocument:
+    """A PDF being processed in bulk mode."""
+
+    def __init__(self, path: Path, file_size_mb: Optional[float] = None, chunks: Optional[List[str]] = None):
+        self.path = path
+        self.file_size_mb = file_size_mb
+        self.chunks = chunks or []
+        self.chunk_summaries: List[Optional[str]] = [None] * len(self.chunks)
+        self.summary: Optional[str] = None
+        self.error: Optional[str] = None
+        self.result_id: Optional[str] = None
+
+
+class BatchSummaryService:
+    """
+    Offline bulk summarization through the OpenAI Batch API.
+    Documents are parsed and chunked as usual, then the map stage and the
+    reduce stage are each submitted as Batch API jobs (JSONL) and polled until
+    done. Requests the batch could not complete (including whole failed
+    batches) fall back to regular calls. A file that cannot be read or
+    summarized is recorded as failed and the rest of the run continues.
+    Files are processed in groups, so only one group's text is held in
+    memory, and batches are split to stay under the input file size limit.
+    Submitted batches are recorded, so re-running an interrupted run picks
+    them up instead of paying for them again.
+    """
+
+    def __init__(
+        self,
+        pdf_parser: PDFParser,
+        openai_service: OpenAIService,
+        storage_service: StorageService,
+        poll_interval: float = None
+    ):
+        self.pdf_parser = pdf_parser
+        self.openai_service = openai_service
+        self.storage_service = storage_service
+        self.client = openai_service.client
+        self.poll_interval = poll_interval or settings.batch_poll_interval_seconds
+        self.max_requests = settings.batch_max_requests
+        self.max_file_bytes = int(settings.batch_max_file_mb * 1024 * 1024)
+        self.group_size = settings.batch_group_documents
+
+    async def summarize_files(self, paths: List[Path], skip_summarized: bool = False) -> List[BulkDocument]:
+        """
+        Summarize PDF files in bulk and store the results (see StorageService.add_bulk_result).
+        
+        Args:
+            paths: PDF files to process
+            skip_summarized: Skip files that already have a successful bulk result
+                (to resume an interrupted run)
+            
+        Returns:
+            Processed documents, each with a summary or an error
+        """
+        await self.storage_service.initialize()
+        summarized = await self.storage_service.get_summarized_bulk_paths() if skip_summarized else set()
+        
+        documents = []
+        # Groups are cut before skipping files, so an interrupted group gets the same
+        # requests again and its batches are found by their payload hash
+        for start in range(0, len(paths), self.group_size):
+            group = [path for path in paths[start:start + self.group_size] if str(path) not in summarized]
+            if group:
+                documents.extend(await self._summarize_group(group))
+        return documents
+    
+    async def _summarize_group(self, paths: List[Path]) -> List[BulkDocument]:
+        """Summarize and store one group of files, then drop their text"""
+        documents = [await self._prepare_document(path) for path in paths]
+        pending = [document for document in documents if document.error is None]
+        
+        await self._run_map_stage(pending)
+        await self._run_reduce_stage([document for document in pending if document.error is None])
+        
+        for document in documents:
+            document.result_id = await self.storage_service.add_bulk_result(
+                source_path=str(document.path),
+                summary=document.summary,
+                file_size=document.file_size_mb,
+                error=document.error
+            )
+            document.chunks, document.chunk_summaries = [], []
+        return documents
+    
+    async def _prepare_document(self, path: Path) -> BulkDocument:
+        """Parse and chunk a PDF; unreadable files are marked as failed"""
+        try:
+            content = path.read_bytes()
+            document = BulkDocument(path, len(content) / (1024 * 1024))
+            text = await self.pdf_parser.parse_pdf(content)
+        except Exception as e:
+            logger.warning("Skipping %s: %s", path, e)
+            document = BulkDocument(path)
+            document.error = str(e)
+            return document
+        
+        if not text or len(text.strip()) < MIN_TEXT_LENGTH:
+            logger.warning("Skipping %s: %s", path, ERROR_NO_TEXT_EXTRACTED)
+            document.error = ERROR_NO_TEXT_EXTRACTED
+            return document
+        
+        document.chunks = self.openai_service._split_text_into_chunks(text)
+        document.chunk_summaries = [None] * len(document.chunks)
+        return document
+    
+    async def _run_map_stage(self, documents: List[BulkDocument]):
+        """Summarize chunks (or whole single-chunk documents) via the Batch API"""
+        cache = self.openai_service.summary_cache
+        model = self.openai_service.model
+        requests = []
+
+        for doc_num, document in enumerate(documents):
+            total = len(document.chunks)
+            if total == 1:
+                requests.append(self._build_request(
+                    f"doc-{doc_num}-final",
+                    self.openai_service._document_summary_messages(document.chunks[0]),
+                    FINAL_SUMMARY_MAX_TOKENS
+                ))
+                continue
+
+            keys = [SummaryCache.make_key(chunk, model, CHUNK_PROMPT_VERSION) for chunk in document.chunks]
+            cached = await cache.get_many(keys) if cache else {}
+            for chunk_num, (chunk, key) in enumerate(zip(document.chunks, keys)):
+                if key in cached:
+                    document.chunk_summaries[chunk_num] = cached[key]
+                    continue
+                requests.append(self._build_request(
+                    f"doc-{doc_num}-chunk-{chunk_num}",
+                    self.openai_service._chunk_summary_messages(chunk, chunk_num + 1, total),
+                    CHUNK_SUMMARY_MAX_TOKENS
+                ))
+
+        results = await self._run_batches(requests)
+
+        for doc_num, document in enumerate(documents):
+            try:
+                await self._complete_map_stage(document, doc_num, results)
+            except Exception as e:
+                logger.warning("Failed to summarize %s: %s", document.path, e)
+                document.error = str(e)
+
+    async def _complete_map_stage(self, document: BulkDocument, doc_num: int, results: Dict[str, str]):
+        """Apply batch results to a document, making regular calls for anything missing"""
+        cache = self.openai_service.summary_cache
+        model = self.openai_service.model
+        total = len(document.chunks)
+        if total == 1:
+            document.summary = results.get(f"doc-{doc_num}-final")
+            if document.summary is None:
+                document.summary = await self.openai_service.generate_summary(document.chunks[0])
+            return
+
+        for chunk_num, chunk in enumerate(document.chunks):
+            if document.chunk_summaries[chunk_num] is not None:
+                continue
+            chunk_summary = results.get(f"doc-{doc_num}-chunk-{chunk_num}")
+            if chunk_summary is None:
+                chunk_summary = await self.openai_service._generate_chunk_summary(chunk, chunk_num + 1, total)
+            if cache:
+                await cache.put(SummaryCache.make_key(chunk, model, CHUNK_PROMPT_VERSION), chunk_summary)
+            document.chunk_summaries[chunk_num] = chunk_summary
+
+    async def _run_reduce_stage(self, documents: List[BulkDocument]):
+        """Combine chunk summaries of multi-chunk documents via the Batch API"""
+        requests = [
+            self._build_request(
+                f"doc-{doc_num}-reduce",
+                self.openai_service._reduce_messages(document.chunk_summaries),
+                FINAL_SUMMARY_MAX_TOKENS
+            )
+            for doc_num, document in enumerate(documents)
+            if document.summary is None
+        ]
+        results = await self._run_batches(requests)
+
+        for doc_num, document in enumerate(documents):
+            if document.summary is not None:
+                continue
+            document.summary = results.get(f"doc-{doc_num}-reduce")
+            if document.summary is not None:
+                continue
+            try:
+                document.summary = await self.openai_service._create_completion(
+                    messages=self.openai_service._reduce_messages(document.chunk_summaries),
+                    max_tokens=FINAL_SUMMARY_MAX_TOKENS
+                )
+            except Exception as e:
+                logger.warning("Failed to summarize %s: %s", document.path, e)
+                document.error = str(e)
+
+    def _build_request(self, custom_id: str, messages: List[dict], max_tokens: int) -> dict:
+        """Build one Batch API JSONL request line"""
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {
+                "model": self.openai_service.model,
+                "messages": messages,
+                "temperature": 0.7,
+                "max_tokens": max_tokens
+            }
+        }
+
+    async def _run_batches(self, requests: List[dict]) -> Dict[str, str]:
+        """
+        Submit requests as one or more batches and wait for all of them.
+
+        Args:
+            requests: JSONL request objects
+
+        Returns:
+            Mapping of custom_id to response text for successful requests
+            (requests in batches that could not be run are missing)
+        """
+        if not requests:
+            return {}
+        batch_ids = []
+        for lines in self._split_batches([json.dumps(request) for request in requests]):
+            try:
+                batch_ids.append(await self._submit_batch(lines))
+            except Exception as e:
+                # These requests fall back to regular calls
+                logger.warning("Could not submit batch: %s", e)
+        results = {}
+        for batch_id in batch_ids:
+            try:
+                batch = await self._wait_for_batch(batch_id)
+                results.update(await self._collect_results(batch))
+            except Exception as e:
+                logger.warning("Could not collect results of batch %s: %s", batch_id, e)
+        return results
+
+    def _split_batches(self, lines: List[str]) -> List[List[str]]:
+        """Group JSONL lines into batches within the request count and input file size limits"""
+        batches = []
+        current: List[str] = []
+        current_bytes = 0
+        for line in lines:
+            line_bytes = len(line.encode("utf-8")) + 1
+            if current and (len(current) >= self.max_requests or current_bytes + line_bytes > self.max_file_bytes):
+                batches.append(current)
+                current, current_bytes = [], 0
+            current.append(line)
+            current_bytes += line_bytes
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _submit_batch(self, lines: List[str]) -> str:
+        """Upload a JSONL input file and create a batch for it, or reuse one submitted earlier"""
+        payload = "\n".join(lines).encode("utf-8")
+        payload_hash = hashlib.sha256(payload).hexdigest()
+        try:
+            existing = await self.storage_service.find_bulk_batch(payload_hash)
+        except aiosqlite.Error as e:
+            logger.warning("Could not look up earlier batches: %s", e)
+            existing = None
+        if existing:
+            logger.info("Resuming batch %s with %d requests", existing, len(lines))
+            return existing
+
+        input_file = await self.client.files.create(
+            file=("batch_input.jsonl", payload),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h"
+        )
+        logger.info("Submitted batch %s with %d requests", batch.id, len(lines))
+        try:
+            await self.storage_service.record_bulk_batch(batch.id, payload_hash, len(lines))
+        except aiosqlite.Error as e:
+            logger.warning("Could not record batch %s; it cannot be resumed: %s", batch.id, e)
+        return batch.id
+
+    async def _wait_for_batch(self, batch_id: str):
+        """Poll a batch until it reaches a terminal status"""
+        while True:
+            batch = await self.client.batches.retrieve(batch_id)
+            if batch.status in BATCH_TERMINAL_STATUSES:
+                try:
+                    await self.storage_service.update_bulk_batch_status(batch_id, batch.status)
+                except aiosqlite.Error as e:
+                    logger.warning("Could not record status of batch %s: %s", batch_id, e)
+                if batch.status == "failed":
+                    # Its requests fall back to regular calls; other batches are unaffected
+                    logger.warning("Batch %s failed: %s", batch_id, batch.errors)
+                else:
+                    logger.info("Batch %s finished with status %s", batch_id, batch.status)
+                return batch
+            await asyncio.sleep(self.poll_interval)
+
+    async def _collect_results(self, batch) -> Dict[str, str]:
+        """Download the output file of a batch and extract response texts"""
+        if not batch.output_file_id:
+            return {}
+        content = await self.client.files.content(batch.output_file_id)
+        results = {}
+        for line in content.text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            choices = (response.get("body") or {}).get("choices") or []
+            if choices:
+                results[record["custom_id"]] = choices[0]["message"]["content"].strip()
+        return results
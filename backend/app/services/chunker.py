@@ -0,0 +1,209 @@
+import re
+import zlib
+from typing import Callable, List, Tuple
+from app.services.summary_cache import normalize_chunk_text
+
+# Past the minimum chunk size, about 1 in N sentences ends a chunk early.
+# Boundaries depend on content, not position, so edits don't shift later chunks.
+CHUNK_BOUNDARY_DIVISOR = 32
+
+# Sentence terminator followed by whitespace
+SENTENCE_END_PATTERN = re.compile(r"[.!?](?=[ \n])")
+
+
+class IncrementalChunker:
+    """
+    Token-based text chunker that accepts text piece by piece (e.g. page by page).
+    Text is split at sentence boundaries and chunks are returned as soon as they
+    are full, with a few sentences of overlap for context preservation. Once a
+    chunk reaches min_tokens it may end at a content-defined boundary sentence,
+    so unchanged parts of a revised document produce the same chunks.
+    """
+
+    def __init__(
+        self,
+        count_tokens: Callable[[str], int],
+        chunk_tokens: int = 10000,
+        min_tokens: int = 5000,
+        overlap_tokens: int = 500
+    ):
+        self.count_tokens = count_tokens
+        self.chunk_tokens = chunk_tokens
+        self.min_tokens = min_tokens
+        self.overlap_tokens = overlap_tokens
+        self.emitted = 0
+
+        self._pending = ""  # text after the last complete sentence
+        self._scan_from = 0  # position in _pending not yet checked for sentence ends
+        # Unterminated text longer than this (in chars) is counted and split if over chunk_tokens
+        self._split_check_chars = chunk_tokens
+        self._raw_parts: List[str] = []  # original text, kept while holding
+        self._total_tokens = 0
+        # Sentences are held back until the document is known to need more than one chunk
+        self._held: List[Tuple[str, int]] = []
+        self._holding = True
+        self._current: List[Tuple[str, int]] = []  # (sentence, tokens)
+        self._current_tokens = 0
+        self._has_new_sentences = False
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Add text and return chunks that are complete.
+
+        Args:
+            text: Next piece of the document
+
+        Returns:
+            Newly completed chunks (possibly empty)
+        """
+        if self._holding:
+            self._raw_parts.append(text)
+        self._pending += text
+
+        # Only new text is scanned; the last old character may now be followed by whitespace
+        sentences = []
+        sentence_start = 0
+        pending = self._pending
+        for match in SENTENCE_END_PATTERN.finditer(pending, max(self._scan_from - 1, 0)):
+            i = match.start()
+            if i == sentence_start or pending[i - 1] != pending[i]:
+                sentences.append(pending[sentence_start:i + 1])
+                sentence_start = i + 1
+        self._pending = pending[sentence_start:]
+        self._scan_from = len(self._pending)
+
+        chunks = []
+        for sentence in sentences + self._split_long_pending():
+            chunks.extend(self._add_sentence(sentence))
+        return chunks
+
+    def finish(self) -> List[str]:
+        """
+        Flush remaining text once the whole document has been fed.
+
+        Returns:
+            Remaining chunks. If the document fits in one chunk, this is the
+            original text unchanged.
+        """
+        chunks = []
+        for sentence in self._split_long_pending(force=True) + [self._pending]:
+            chunks.extend(self._add_sentence(sentence))
+        self._pending = ""
+        self._scan_from = 0
+
+        if self._holding:
+            text = "".join(self._raw_parts)
+            return [text] if text.strip() else []
+
+        if self._current and self._has_new_sentences:
+            chunks.append(self._emit())
+        return chunks
+
+    def _split_long_pending(self, force: bool = False) -> List[str]:
+        """
+        Cut unterminated text (e.g. a table or text without punctuation) into
+        pieces of at most chunk_tokens, so chunks are still produced before
+        finish(). Tokens are only counted each time the text doubles in length.
+
+        Args:
+            force: Count tokens regardless of the text length
+
+        Returns:
+            Pieces to be added as sentences, in order
+        """
+        pieces = []
+        while force or len(self._pending) >= self._split_check_chars:
+            pending_tokens = self.count_tokens(self._pending)
+            if pending_tokens <= self.chunk_tokens:
+                self._split_check_chars = max(len(self._pending) * 2, self.chunk_tokens)
+                break
+            # Cut at whitespace near the chunk_tokens mark, moving back while the piece is too long
+            cut, cut_tokens = len(self._pending), pending_tokens
+            while cut > 1 and cut_tokens > self.chunk_tokens:
+                target = cut * self.chunk_tokens // cut_tokens
+                space = max(self._pending.rfind(" ", 0, target), self._pending.rfind("\n", 0, target))
+                cut = space + 1 if space > 0 else max(target, 1)
+                cut_tokens = self.count_tokens(self._pending[:cut])
+            pieces.append(self._pending[:cut])
+            self._pending = self._pending[cut:]
+            self._scan_from = len(self._pending)
+            self._split_check_chars = self.chunk_tokens
+        return pieces
+
+    def _add_sentence(self, sentence: str) -> List[str]:
+        """Count a complete sentence and chunk it (or hold it back)"""
+        sentence = sentence.strip()
+        if not sentence:
+            return []
+
+        sentence_tokens = self.count_tokens(sentence)
+        self._total_tokens += sentence_tokens
+
+        if self._holding:
+            self._held.append((sentence, sentence_tokens))
+            if self._total_tokens <= self.chunk_tokens:
+                return []
+            # Document needs several chunks: replay everything held so far
+            self._holding = False
+            self._raw_parts = []
+            held, self._held = self._held, []
+            chunks = []
+            for held_sentence, held_tokens in held:
+                chunks.extend(self._place_sentence(held_sentence, held_tokens))
+            return chunks
+
+        return self._place_sentence(sentence, sentence_tokens)
+
+    def _place_sentence(self, sentence: str, sentence_tokens: int) -> List[str]:
+        """Add a sentence to the current chunk, returning chunks it completes"""
+        chunks = []
+
+        if sentence_tokens > self.chunk_tokens:
+            if self._current and self._has_new_sentences:
+                chunks.append(self._emit())
+            self._current, self._current_tokens = [], 0
+            self._has_new_sentences = False
+            self.emitted += 1
+            chunks.append(sentence)
+            return chunks
+
+        if self._current_tokens + sentence_tokens > self.chunk_tokens and self._current:
+            if self._has_new_sentences:
+                chunks.append(self._emit())
+                # Start new chunk with overlap (last few sentences) for context preservation
+                self._current, self._current_tokens = self._overlap_tail()
+            else:
+                self._current, self._current_tokens = [], 0
+
+        self._current.append((sentence, sentence_tokens))
+        self._current_tokens += sentence_tokens
+        self._has_new_sentences = True
+
+        if self._current_tokens >= self.min_tokens and self._is_chunk_boundary(sentence):
+            chunks.append(self._emit())
+            self._current, self._current_tokens = self._overlap_tail()
+            self._has_new_sentences = False
+
+        return chunks
+
+    def _emit(self) -> str:
+        """Join the current sentences into a chunk"""
+        self.emitted += 1
+        return " ".join(sentence for sentence, _ in self._current)
+
+    def _overlap_tail(self) -> Tuple[List[Tuple[str, int]], int]:
+        """Take the last sentences of the current chunk that fit in overlap_tokens"""
+        overlap = []
+        overlap_tokens = 0
+        for sentence, tokens in reversed(self._current):
+            if overlap_tokens + tokens > self.overlap_tokens:
+                break
+            overlap.insert(0, (sentence, tokens))
+            overlap_tokens += tokens
+        return overlap, overlap_tokens
+
+    @staticmethod
+    def _is_chunk_boundary(sentence: str) -> bool:
+        """Check whether a sentence is a content-defined chunk boundary"""
+        normalized = normalize_chunk_text(sentence).encode("utf-8")
+        return zlib.crc32(normalized) % CHUNK_BOUNDARY_DIVISOR == 0
@@ -0,0 +1,172 @@
+import re
+import numpy as np
+from typing import List
+from app.core.config import settings
+from app.services.summary_cache import PAGE_MARKER_PATTERN
+
+# Candidate breaks; a break only ends a sentence if the next one starts like a sentence
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?…])\s+")
+SENTENCE_OPENERS = "\"'([«“„"
+# Words in any script: a letter followed by letters, digits, apostrophes or hyphens
+WORD_PATTERN = re.compile(r"[^\W\d_][\w'’-]+")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before
+being below between both but by can could did do does doing down during each few for from
+further had has have having he her here hers herself him himself his how i if in into is it
+its itself just me more most my myself no nor not now of off on once only or other our ours
+ourselves out over own same she should so some such than that the their theirs them
+themselves then there these they this those through to too under until up very was we were
+what when where which while who whom why will with would you your yours yourself yourselves
+а але би бо був була були було в вже ви від для до же з за із й на над не ні
+о об однак по під при про та так також те то ти у хоча це цей ця ці чи що щоб як який
+яка яке які я ми він вона воно вони їх його її їм ним нею ще є
+""".split())
+
+
+class ExtractiveSummarizer:
+    """
+    Local extractive summarizer (no API calls).
+    Sentences are scored with TF-IDF and ranked with TextRank over a cosine
+    similarity matrix; the top sentences are returned in document order.
+    """
+
+    def __init__(
+        self,
+        summary_sentences: int = None,
+        max_candidates: int = None,
+        max_terms: int = 2000,
+        damping: float = 0.85
+    ):
+        self.summary_sentences = summary_sentences or settings.extractive_summary_sentences
+        self.max_candidates = max_candidates or settings.extractive_max_candidates
+        self.max_terms = max_terms
+        self.damping = damping
+
+    def summarize(self, text: str, num_sentences: int = None) -> str:
+        """
+        Build an extractive summary of the text.
+
+        Args:
+            text: Document text (as produced by PDFParser)
+            num_sentences: Number of sentences to keep (defaults to settings)
+
+        Returns:
+            Selected sentences joined in document order
+        """
+        sentences = self._split_sentences(text)
+        selected = self._select(sentences, num_sentences or self.summary_sentences)
+        return " ".join(sentences[i] for i in selected)
+
+    def condense(self, text: str, ratio: float) -> str:
+        """
+        Shrink text to roughly a fraction of its sentences, keeping document order.
+        Used as a pre-pass to reduce what gets sent to the LLM.
+
+        Args:
+            text: Document text
+            ratio: Fraction of sentences to keep (0-1)
+
+        Returns:
+            Condensed text
+        """
+        sentences = self._split_sentences(text)
+        keep = max(int(len(sentences) * ratio), self.summary_sentences)
+        if keep >= len(sentences):
+            return text
+        selected = self._select(sentences, keep)
+        return "\n".join(sentences[i] for i in selected)
+
+    def _split_sentences(self, text: str) -> List[str]:
+        """Split text into sentences, dropping page markers and table rows"""
+        sentences = []
+        for block in PAGE_MARKER_PATTERN.sub("\n\n", text).split("\n\n"):
+            lines = [line for line in block.splitlines() if not line.lstrip().startswith("|")]
+            block_text = " ".join(" ".join(lines).split())
+            sentences.extend(s for s in self._split_block(block_text) if len(s.split()) >= 4)
+        return sentences
+
+    @staticmethod
+    def _split_block(text: str) -> List[str]:
+        """Split a paragraph at terminators followed by an uppercase letter, digit or quote (any script)"""
+        sentences = []
+        for piece in SENTENCE_SPLIT_PATTERN.split(text):
+            first = piece[:1]
+            if sentences and not (first.isupper() or first.isdigit() or first in SENTENCE_OPENERS):
+                sentences[-1] = f"{sentences[-1]} {piece}"
+            else:
+                sentences.append(piece)
+        return sentences
+
+    def _select(self, sentences: List[str], count: int) -> List[int]:
+        """
+        Pick the indexes of the most central sentences.
+
+        Args:
+            sentences: Candidate sentences
+            count: Number of sentences to select
+
+        Returns:
+            Sorted indexes of selected sentences
+        """
+        if len(sentences) <= count:
+            return list(range(len(sentences)))
+
+        tfidf = self._tfidf_matrix(sentences)
+        tfidf_scores = tfidf.sum(axis=1)
+
+        # Bound the O(n^2) similarity matrix by ranking only the best candidates
+        candidates = np.arange(len(sentences))
+        if len(sentences) > self.max_candidates:
+            candidates = np.sort(np.argpartition(-tfidf_scores, self.max_candidates)[:self.max_candidates])
+
+        scores = self._textrank(tfidf[candidates])
+        # Break ties between equally central sentences by their TF-IDF weight
+        scores = scores + 1e-3 * tfidf_scores[candidates] / (tfidf_scores[candidates].max() or 1.0)
+        top = candidates[np.argsort(-scores)[:count]]
+        return sorted(top.tolist())
+
+    def _tfidf_matrix(self, sentences: List[str]) -> np.ndarray:
+        """Build an L2-normalized sentence x term TF-IDF matrix"""
+        tokenized = [
+            [word for word in WORD_PATTERN.findall(sentence.lower()) if word not in STOPWORDS]
+            for sentence in sentences
+        ]
+
+        document_frequency = {}
+        for words in tokenized:
+            for word in set(words):
+                document_frequency[word] = document_frequency.get(word, 0) + 1
+
+        vocabulary = sorted(document_frequency, key=document_frequency.get, reverse=True)[:self.max_terms]
+        term_index = {word: i for i, word in enumerate(vocabulary)}
+
+        matrix = np.zeros((len(sentences), len(vocabulary)), dtype=np.float32)
+        for row, words in enumerate(tokenized):
+            for word in words:
+                column = term_index.get(word)
+                if column is not None:
+                    matrix[row, column] += 1.0
+
+        frequencies = np.array([document_frequency[word] for word in vocabulary], dtype=np.float32)
+        matrix *= np.log((1 + len(sentences)) / (1 + frequencies)) + 1
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _textrank(self, tfidf: np.ndarray, max_iterations: int = 100, tolerance: float = 1e-6) -> np.ndarray:
+        """Run PageRank over the cosine similarity graph of sentences"""
+        similarity = tfidf @ tfidf.T
+        np.fill_diagonal(similarity, 0.0)
+        row_sums = similarity.sum(axis=1, keepdims=True)
+        row_sums[row_sums == 0] = 1.0
+        transition = (similarity / row_sums).T
+
+        n = similarity.shape[0]
+        scores = np.full(n, 1.0 / n, dtype=np.float32)
+        for _ in range(max_iterations):
+            updated = (1 - self.damping) / n + self.damping * (transition @ scores)
+            if np.abs(updated - scores).sum() < tolerance:
+                return updated
+            scores = updated
+        return scores
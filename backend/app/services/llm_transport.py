@@ -0,0 +1,212 @@
+import time
+import asyncio
+import logging
+import importlib.util
+from collections import deque
+from typing import TYPE_CHECKING, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+import httpx
+from openai import APITimeoutError
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    # scheduler.py imports LatencyTracker from this module
+    from app.services.scheduler import JobScheduler
+
+# Call types with their own timeouts and metrics
+MAP_CALL = "map"
+REDUCE_CALL = "reduce"
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+def build_http_client() -> httpx.AsyncClient:
+    """
+    Build the pooled HTTP client used for OpenAI calls.
+    HTTP/2 is used when enabled and the h2 package is installed.
+
+    Returns:
+        Configured httpx client
+    """
+    http2 = settings.openai_http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("OPENAI_HTTP2 is enabled but the h2 package is not installed; using HTTP/1.1")
+        http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.openai_max_connections,
+            max_keepalive_connections=settings.openai_max_keepalive_connections,
+            keepalive_expiry=settings.openai_keepalive_expiry_seconds
+        ),
+        timeout=call_timeout(REDUCE_CALL)
+    )
+
+
+def call_timeout(call_type: str) -> httpx.Timeout:
+    """
+    Get the request timeout for a call type.
+
+    Args:
+        call_type: MAP_CALL or REDUCE_CALL
+
+    Returns:
+        Timeout with connect and read limits for the call type
+    """
+    read_timeout = (
+        settings.openai_map_read_timeout_seconds if call_type == MAP_CALL
+        else settings.openai_reduce_read_timeout_seconds
+    )
+    return httpx.Timeout(read_timeout, connect=settings.openai_connect_timeout_seconds)
+
+
+class LatencyTracker:
+    """Rolling window of call latencies with percentile lookups."""
+
+    def __init__(self, window: int = 500):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        """Add a latency sample"""
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Get a latency percentile over the window.
+
+        Args:
+            q: Percentile (0-100)
+
+        Returns:
+            Latency in seconds, or None without samples
+        """
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(int(len(ordered) * q / 100), len(ordered) - 1)
+        return ordered[index]
+
+
+class TransportMetrics:
+    """Per call type counters and latency percentiles for OpenAI calls."""
+
+    def __init__(self):
+        self.latencies: Dict[str, LatencyTracker] = {
+            MAP_CALL: LatencyTracker(),
+            REDUCE_CALL: LatencyTracker()
+        }
+        self.counters: Dict[str, Dict[str, int]] = {
+            call_type: {"calls": 0, "errors": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0, "hedges_skipped": 0}
+            for call_type in self.latencies
+        }
+
+    def snapshot(self) -> dict:
+        """Get current counters and p50/p95/p99 latencies (seconds) per call type"""
+        result = {}
+        for call_type, tracker in self.latencies.items():
+            result[call_type] = {
+                **self.counters[call_type],
+                **{
+                    f"p{q}_seconds": round(value, 4) if value is not None else None
+                    for q, value in ((q, tracker.percentile(q)) for q in (50, 95, 99))
+                }
+            }
+        return result
+
+
+class HedgedCaller:
+    """
+    Runs outbound calls with latency tracking and optional hedging.
+    A hedged call starts a duplicate request once the original has taken
+    longer than the recent p95 latency and returns whichever succeeds first;
+    the other one is cancelled. The duplicate needs a slot of its own from the
+    scheduler, so hedging never exceeds the concurrency budget; without a free
+    slot the call just keeps waiting for the original request.
+    """
+
+    def __init__(
+        self,
+        metrics: TransportMetrics,
+        hedge_enabled: bool = None,
+        scheduler: Optional["JobScheduler"] = None
+    ):
+        self.metrics = metrics
+        self.scheduler = scheduler
+        self.hedge_enabled = settings.openai_hedge_enabled if hedge_enabled is None else hedge_enabled
+        self.hedge_min_samples = settings.openai_hedge_min_samples
+        self.hedge_min_delay = settings.openai_hedge_min_delay_seconds
+
+    def hedge_delay(self, call_type: str) -> Optional[float]:
+        """Delay before sending a duplicate request, or None if not hedging"""
+        if not self.hedge_enabled or call_type != MAP_CALL:
+            return None
+        tracker = self.metrics.latencies[call_type]
+        if len(tracker.samples) < self.hedge_min_samples:
+            return None
+        return max(tracker.percentile(95), self.hedge_min_delay)
+
+    async def call(self, call_type: str, send: Callable[[], Awaitable[T]]) -> T:
+        """
+        Send a request, hedging it if enabled for the call type.
+
+        Args:
+            call_type: MAP_CALL or REDUCE_CALL
+            send: Coroutine factory performing one request
+
+        Returns:
+            Result of the first request to succeed
+        """
+        counters = self.metrics.counters[call_type]
+        counters["calls"] += 1
+        delay = self.hedge_delay(call_type)
+
+        attempts = [asyncio.create_task(self._timed(call_type, send))]
+        hedge_slot = False
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(attempts, timeout=delay)
+                if not done:
+                    hedge_slot = self.scheduler is not None and self.scheduler.try_acquire()
+                    if self.scheduler is None or hedge_slot:
+                        counters["hedges"] += 1
+                        attempts.append(asyncio.create_task(self._timed(call_type, send)))
+                    else:
+                        counters["hedges_skipped"] += 1
+
+            pending = set(attempts)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not attempts[0]:
+                            counters["hedge_wins"] += 1
+                        return task.result()
+                if not pending:
+                    # Every attempt failed; surface the original request's error
+                    return attempts[0].result()
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # Mark a losing attempt's error as handled
+                    task.exception()
+            if hedge_slot:
+                # The duplicate has finished or is being cancelled; its slot is free again
+                self.scheduler.release()
+
+    async def _timed(self, call_type: str, send: Callable[[], Awaitable[T]]) -> T:
+        """Run one request and record its latency or failure"""
+        started = time.monotonic()
+        try:
+            result = await send()
+        except APITimeoutError:
+            self.metrics.counters[call_type]["timeouts"] += 1
+            raise
+        except Exception:
+            self.metrics.counters[call_type]["errors"] += 1
+            raise
+        self.metrics.latencies[call_type].record(time.monotonic() - started)
+        return result
@@ -1,29 +1,182 @@
 from openai import AsyncOpenAI
 from openai import APIError, RateLimitError, APIConnectionError, APIStatusError
-from typing import Optional, List
+from fastapi import HTTPException
+from typing import Optional, List, AsyncIterator
 import asyncio
 import tiktoken
 from app.core.config import settings
-from app.core.exceptions import DocumentProcessingError
+from app.core.exceptions import DocumentProcessingError, ServiceUnavailableError
+from app.services.resilience import CircuitBreaker, CircuitOpenError, backoff_delay, parse_retry_after
+from app.services.summary_cache import SummaryCache
+from app.services.chunker import IncrementalChunker
+from app.services.scheduler import JobScheduler
+from app.services.llm_transport import (
+    MAP_CALL,
+    REDUCE_CALL,
+    HedgedCaller,
+    TransportMetrics,
+    build_http_client,
+    call_timeout
+)
+
+# HTTP statuses worth retrying (timeouts, conflicts, rate limits, server errors)
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+# Response size limits for map (chunk) and final summary calls
+CHUNK_SUMMARY_MAX_TOKENS = 2000
+FINAL_SUMMARY_MAX_TOKENS = 4000
+
+# Bump when the chunk summary prompt changes to invalidate cached summaries
+CHUNK_PROMPT_VERSION = "2"
 
 
 class OpenAIService:
     """Service for interacting with OpenAI API to generate summaries."""
     
-    def __init__(self):
+    def __init__(self, summary_cache: Optional[SummaryCache] = None, scheduler: Optional[JobScheduler] = None):
         if not settings.openai_api_key:
             raise ValueError("OPENAI_API_KEY environment variable is not set")
         
-        self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+        # Retries are handled by _create_completion, not by the client
+        self.client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url or None,
+            max_retries=0,
+            http_client=build_http_client()
+        )
+        self.metrics = TransportMetrics()
         self.model = settings.openai_model
+        self._encoding = None
         
-        try:
-            self.encoding = tiktoken.encoding_for_model(self.model)
-        except KeyError:
-            self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.max_retries = settings.openai_max_retries
+        self.retry_base_delay = settings.openai_retry_base_delay_seconds
+        self.retry_max_delay = settings.openai_retry_max_delay_seconds
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=settings.openai_circuit_failure_threshold,
+            reset_timeout=settings.openai_circuit_reset_seconds
+        )
         
         self.chunk_size_tokens = 10000
+        self.chunk_min_tokens = self.chunk_size_tokens // 2
         self.chunk_overlap_tokens = 500
+        self.summary_cache = summary_cache
+        # Shares the API concurrency budget between documents, cheapest job first
+        self.scheduler = scheduler or JobScheduler(
+            name="api",
+            capacity=settings.openai_map_concurrency,
+            aging_per_second=settings.scheduler_api_aging_per_second,
+            small_job_cost=settings.scheduler_api_small_job_cost
+        )
+        # Hedged duplicates take their own slot from the same budget
+        self.hedged_caller = HedgedCaller(self.metrics, scheduler=self.scheduler)
+    
+    @property
+    def encoding(self):
+        """Tiktoken encoding for the model, loaded on first use."""
+        if self._encoding is None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+        return self._encoding
+    
+    async def warm_up(self):
+        """Pre-load the tiktoken encoding so the first request doesn't pay for it."""
+        await asyncio.to_thread(lambda: self.encoding)
+        if self.summary_cache:
+            await self.summary_cache.initialize()
+    
+    async def close(self):
+        """Close the underlying HTTP client."""
+        await self.client.close()
+    
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Check whether an OpenAI error is transient and worth retrying"""
+        if isinstance(error, APIConnectionError):
+            return True
+        if isinstance(error, APIStatusError):
+            return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+        return False
+    
+    @staticmethod
+    def _is_outage(error: Exception) -> bool:
+        """
+        Check whether an error means OpenAI is degraded (counts towards the circuit breaker).
+        Rate limits and conflicts are retried but don't trip the breaker: they
+        clear on their own, and an open breaker would fail calls waiting them out.
+        """
+        if isinstance(error, APIConnectionError):
+            # Includes timeouts
+            return True
+        if isinstance(error, APIStatusError):
+            return error.status_code == 408 or error.status_code >= 500
+        return False
+    
+    async def _create_completion(self, messages: List[dict], max_tokens: int, call_type: str = REDUCE_CALL) -> str:
+        """
+        Call the chat completions API with retries and a circuit breaker.
+        Transient errors (including timeouts) are retried with exponential
+        backoff and jitter, honoring Retry-After when the API sends it. Only
+        connection errors, timeouts and 5xx count towards the breaker.
+        
+        Args:
+            messages: Chat messages to send
+            max_tokens: Maximum tokens in the response
+            call_type: MAP_CALL or REDUCE_CALL (selects timeouts and hedging)
+            
+        Returns:
+            Stripped response text
+        """
+        attempt = 0
+        while True:
+            try:
+                is_trial = self.circuit_breaker.before_call()
+            except CircuitOpenError as e:
+                raise ServiceUnavailableError(
+                    "OpenAI API is temporarily unavailable. Please try again later.",
+                    retry_after=e.retry_after
+                )
+            
+            try:
+                response = await self.hedged_caller.call(
+                    call_type,
+                    lambda: self.client.chat.completions.create(
+                        model=self.model,
+                        messages=messages,
+                        temperature=0.7,
+                        max_tokens=max_tokens,
+                        timeout=call_timeout(call_type)
+                    )
+                )
+            except asyncio.CancelledError:
+                # No outcome; don't leave a half-open trial marked as running
+                self.circuit_breaker.record_cancelled(is_trial)
+                raise
+            except Exception as e:
+                if not self._is_retryable(e):
+                    # Upstream answered (e.g. 400/401), so it isn't degraded
+                    self.circuit_breaker.record_success()
+                    raise
+                if self._is_outage(e):
+                    self.circuit_breaker.record_failure()
+                else:
+                    # Rate limited: upstream is up, so neither a failure nor a success
+                    self.circuit_breaker.record_cancelled(is_trial)
+                if attempt >= self.max_retries:
+                    raise
+                
+                delay = backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay)
+                response_headers = getattr(getattr(e, "response", None), "headers", None)
+                retry_after = parse_retry_after(response_headers)
+                if retry_after is not None:
+                    delay = min(retry_after, self.retry_max_delay)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            
+            self.circuit_breaker.record_success()
+            return response.choices[0].message.content.strip()
     
     def _count_tokens(self, text: str) -> int:
         """
@@ -37,10 +190,19 @@ class OpenAIService:
         """
         return len(self.encoding.encode(text))
     
+    def _new_chunker(self) -> IncrementalChunker:
+        """Create a chunker configured with this service's token limits"""
+        return IncrementalChunker(
+            count_tokens=self._count_tokens,
+            chunk_tokens=self.chunk_size_tokens,
+            min_tokens=self.chunk_min_tokens,
+            overlap_tokens=self.chunk_overlap_tokens
+        )
+    
     def _split_text_into_chunks(self, text: str) -> List[str]:
         """
         Split text into chunks based on token count with overlap for context preservation.
-        Tries to break at sentence boundaries when possible.
+        Tries to break at sentence boundaries when possible (see IncrementalChunker).
         
         Args:
             text: Text to split
@@ -48,98 +210,104 @@ class OpenAIService:
         Returns:
             List of text chunks
         """
-        # Check if text fits in one chunk
-        total_tokens = self._count_tokens(text)
-        if total_tokens <= self.chunk_size_tokens:
-            return [text]
-        
-        chunks = []
-        # Split by sentences first for better chunking
-        sentences = []
-        current_sentence = ""
-        
-        for char in text:
-            current_sentence += char
-            if char in '.!?' and (len(current_sentence) == 1 or current_sentence[-2] != char):
-                # Check if followed by space or newline
-                if len(text) > len(current_sentence) and text[len(current_sentence)] in ' \n':
-                    sentences.append(current_sentence.strip())
-                    current_sentence = ""
-        
-        if current_sentence.strip():
-            sentences.append(current_sentence.strip())
-        
-        # Combine sentences into chunks based on token count
-        current_chunk = []
-        current_tokens = 0
-        
-        for sentence in sentences:
-            sentence_tokens = self._count_tokens(sentence)
-            
-            if sentence_tokens > self.chunk_size_tokens:
-                if current_chunk:
-                    chunks.append(' '.join(current_chunk))
-                    current_chunk = []
-                    current_tokens = 0
-                chunks.append(sentence)
-                continue
-            
-            if current_tokens + sentence_tokens > self.chunk_size_tokens and current_chunk:
-                chunks.append(' '.join(current_chunk))
-                # Start new chunk with overlap (last few sentences) for context preservation
-                overlap_sentences = []
-                overlap_tokens = 0
-                for s in reversed(current_chunk):
-                    s_tokens = self._count_tokens(s)
-                    if overlap_tokens + s_tokens <= self.chunk_overlap_tokens:
-                        overlap_sentences.insert(0, s)
-                        overlap_tokens += s_tokens
-                    else:
-                        break
-                current_chunk = overlap_sentences + [sentence]
-                current_tokens = overlap_tokens + sentence_tokens
-            else:
-                current_chunk.append(sentence)
-                current_tokens += sentence_tokens
-        
-        if current_chunk:
-            chunks.append(' '.join(current_chunk))
-        
+        chunker = self._new_chunker()
+        chunks = chunker.feed(text) + chunker.finish()
         return chunks if chunks else [text]
     
-    async def _generate_chunk_summary(self, text: str, chunk_num: int, total_chunks: int) -> str:
+    @staticmethod
+    def _document_summary_messages(text: str) -> List[dict]:
+        """Build messages for summarizing a document that fits in one chunk"""
+        return [
+            {
+                "role": "system",
+                "content": "You are a helpful assistant that creates concise, informative summaries of documents. Focus on key points, main ideas, and important details."
+            },
+            {
+                "role": "user",
+                "content": f"Please provide a comprehensive summary of the following document. Make it clear, well-structured, and highlight the most important information:\n\n{text}"
+            }
+        ]
+    
+    @staticmethod
+    def _chunk_summary_messages(text: str, chunk_num: int, total_chunks: Optional[int] = None) -> List[dict]:
+        """Build messages for summarizing one chunk (map stage); total_chunks is None while streaming"""
+        if total_chunks is None:
+            context = f" (Part {chunk_num})"
+        else:
+            context = f" (Part {chunk_num} of {total_chunks})" if total_chunks > 1 else ""
+        return [
+            {
+                "role": "system",
+                "content": "You are a helpful assistant that creates concise, informative summaries of document sections. Focus on key points, main ideas, and important details."
+            },
+            {
+                "role": "user",
+                "content": f"Please provide a clear and structured summary of this document section{context}. Focus on the most important information:\n\n{text}"
+            }
+        ]
+    
+    @staticmethod
+    def _reduce_messages(chunk_summaries: List[str]) -> List[dict]:
+        """Build messages for combining chunk summaries (reduce stage)"""
+        combined_summaries = "\n\n".join([
+            f"Section {i+1} Summary:\n{summary}"
+            for i, summary in enumerate(chunk_summaries)
+        ])
+        return [
+            {
+                "role": "system",
+                "content": "You are a helpful assistant that creates a comprehensive, unified summary from multiple document section summaries. Combine them into a coherent, well-structured final summary."
+            },
+            {
+                "role": "user",
+                "content": f"Please create a comprehensive final summary from these document section summaries. Make it clear, well-structured, and highlight the most important information from all sections:\n\n{combined_summaries}"
+            }
+        ]
+    
+    async def _generate_chunk_summary(self, text: str, chunk_num: int, total_chunks: Optional[int] = None) -> str:
         """
         Generate summary for a single chunk.
         
         Args:
             text: Chunk text to summarize
             chunk_num: Current chunk number
-            total_chunks: Total number of chunks
+            total_chunks: Total number of chunks (None if not known yet)
             
         Returns:
             Summary of the chunk
         """
-        context = f" (Part {chunk_num} of {total_chunks})" if total_chunks > 1 else ""
-        
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant that creates concise, informative summaries of document sections. Focus on key points, main ideas, and important details."
-                },
-                {
-                    "role": "user",
-                    "content": f"Please provide a clear and structured summary of this document section{context}. Focus on the most important information:\n\n{text}"
-                }
-            ],
-            temperature=0.7,
-            max_tokens=2000
+        return await self._create_completion(
+            messages=self._chunk_summary_messages(text, chunk_num, total_chunks),
+            max_tokens=CHUNK_SUMMARY_MAX_TOKENS,
+            call_type=MAP_CALL
         )
+    
+    async def _summarize_chunk(self, chunk: str, chunk_num: int, job_cost: float) -> str:
+        """
+        Map stage for one chunk: reuse a cached summary or call the API.
         
-        return response.choices[0].message.content.strip()
+        Args:
+            chunk: Chunk text
+            chunk_num: Chunk number (1-based)
+            job_cost: Estimated API cost of the document (for the scheduler)
+            
+        Returns:
+            Chunk summary
+        """
+        key = SummaryCache.make_key(chunk, self.model, CHUNK_PROMPT_VERSION)
+        if self.summary_cache:
+            cached = await self.summary_cache.get_many([key])
+            if key in cached:
+                return cached[key]
+        
+        async with self.scheduler.slot(job_cost):
+            chunk_summary = await self._generate_chunk_summary(chunk, chunk_num)
+        
+        if self.summary_cache:
+            await self.summary_cache.put(key, chunk_summary)
+        return chunk_summary
     
-    async def generate_summary(self, text: str, max_length: int = None) -> str:
+    async def generate_summary(self, text: str, max_length: int = None, job_cost: Optional[float] = None) -> str:
         """
         Generate a summary of the provided text using OpenAI API.
         For large documents, uses chunking strategy to save tokens.
@@ -147,64 +315,74 @@ class OpenAIService:
         Args:
             text: The text content to summarize
             max_length: Maximum length of the summary in characters (optional)
+            job_cost: Estimated API cost for the scheduler (optional)
+        
+        Returns:
+            Generated summary string
+        """
+        async def single_part():
+            yield text
+        
+        return await self.generate_summary_stream(single_part(), max_length=max_length, job_cost=job_cost)
+    
+    async def generate_summary_stream(
+        self,
+        parts: AsyncIterator[str],
+        max_length: int = None,
+        job_cost: Optional[float] = None
+    ) -> str:
+        """
+        Generate a summary from text that arrives incrementally (e.g. page by page).
+        Each chunk is sent to the map stage as soon as it is full, while later
+        parts are still being produced, so parsing overlaps with API calls.
+        
+        Args:
+            parts: Async iterator of text parts, joined with newlines
+            max_length: Maximum length of the summary in characters (optional)
+            job_cost: Estimated API cost for the scheduler (see estimate_job_costs);
+                without it the number of chunks seen so far is used
         
         Returns:
             Generated summary string
         """
-        # Split into chunks if document is large
-        chunks = self._split_text_into_chunks(text)
+        chunker = self._new_chunker()
+        map_tasks = []
+        
+        def current_cost() -> float:
+            return job_cost if job_cost is not None else float(len(map_tasks) + 1)
+        
+        def dispatch(chunks: List[str]):
+            for chunk in chunks:
+                map_tasks.append(asyncio.create_task(
+                    self._summarize_chunk(chunk, len(map_tasks) + 1, current_cost())
+                ))
         
         try:
-            if len(chunks) == 1:
+            separator = ""
+            async for part in parts:
+                dispatch(chunker.feed(separator + part))
+                separator = "\n"
+            final_chunks = chunker.finish()
+            
+            if not map_tasks and len(final_chunks) <= 1:
                 # Small document - single API call
-                response = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are a helpful assistant that creates concise, informative summaries of documents. Focus on key points, main ideas, and important details."
-                        },
-                        {
-                            "role": "user",
-                            "content": f"Please provide a comprehensive summary of the following document. Make it clear, well-structured, and highlight the most important information:\n\n{text}"
-                        }
-                    ],
-                    temperature=0.7,
-                    max_tokens=4000
-                )
-                summary = response.choices[0].message.content.strip()
+                async with self.scheduler.slot(current_cost()):
+                    summary = await self._create_completion(
+                        messages=self._document_summary_messages(final_chunks[0] if final_chunks else ""),
+                        max_tokens=FINAL_SUMMARY_MAX_TOKENS
+                    )
             else:
                 # Large document - chunking strategy
-                # Step 1: Summarize each chunk
-                chunk_summaries = []
-                for i, chunk in enumerate(chunks, 1):
-                    chunk_summaries.append(await self._generate_chunk_summary(chunk, i, len(chunks)))
-                    # Small delay to avoid rate limits
-                    if i < len(chunks):
-                        await asyncio.sleep(0.1)
+                # Step 1: Wait for chunk summaries (only chunks missing from the cache hit the API)
+                dispatch(final_chunks)
+                chunk_summaries = await asyncio.gather(*map_tasks)
                 
                 # Step 2: Combine chunk summaries into final summary
-                combined_summaries = "\n\n".join([
-                    f"Section {i+1} Summary:\n{summary}"
-                    for i, summary in enumerate(chunk_summaries)
-                ])
-                
-                response = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are a helpful assistant that creates a comprehensive, unified summary from multiple document section summaries. Combine them into a coherent, well-structured final summary."
-                        },
-                        {
-                            "role": "user",
-                            "content": f"Please create a comprehensive final summary from these document section summaries. Make it clear, well-structured, and highlight the most important information from all sections:\n\n{combined_summaries}"
-                        }
-                    ],
-                    temperature=0.7,
-                    max_tokens=4000
-                )
-                summary = response.choices[0].message.content.strip()
+                async with self.scheduler.slot(current_cost()):
+                    summary = await self._create_completion(
+                        messages=self._reduce_messages(chunk_summaries),
+                        max_tokens=FINAL_SUMMARY_MAX_TOKENS
+                    )
             
             # Ensure summary doesn't exceed max_length if specified
             if max_length and len(summary) > max_length:
@@ -212,12 +390,14 @@ class OpenAIService:
             
             return summary
             
+        except HTTPException:
+            raise
         except RateLimitError as e:
-            raise DocumentProcessingError(
+            raise ServiceUnavailableError(
                 f"OpenAI API rate limit exceeded. Please try again later. Details: {str(e)}"
             )
         except APIConnectionError as e:
-            raise DocumentProcessingError(
+            raise ServiceUnavailableError(
                 f"Failed to connect to OpenAI API. Please check your internet connection. Details: {str(e)}"
             )
         except APIStatusError as e:
@@ -227,9 +407,13 @@ class OpenAIService:
             elif status_code == 403:
                 raise DocumentProcessingError("OpenAI API access forbidden. Please check your API key permissions.")
             elif status_code == 429:
-                raise DocumentProcessingError(
+                raise ServiceUnavailableError(
                     f"OpenAI API rate limit exceeded. Please try again later. Details: {str(e)}"
                 )
+            elif status_code is not None and status_code >= 500:
+                raise ServiceUnavailableError(
+                    f"OpenAI API is unavailable (status {status_code}). Please try again later."
+                )
             else:
                 raise DocumentProcessingError(
                     f"OpenAI API error (status {status_code}): {str(e)}"
@@ -238,3 +422,6 @@ class OpenAIService:
             raise DocumentProcessingError(f"OpenAI API error: {str(e)}")
         except Exception as e:
             raise DocumentProcessingError(f"Unexpected error generating summary: {str(e)}")
+        finally:
+            for task in map_tasks:
+                task.cancel()
@@ -1,7 +1,25 @@
 import io
+import csv
+import asyncio
+from typing import AsyncIterator, Iterator, Optional, Set
 import pdfplumber
-from pdf2image import convert_from_bytes
+import pypdfium2
 import pytesseract
+from PIL import Image
+from app.core.config import settings
+from app.services.scheduler import JobScheduler
+
+# Table strategies that rely on ruling lines drawn on the page
+RULED_TABLE_STRATEGIES = {"lines", "lines_strict"}
+
+# Roughly 4 characters per token for English text
+CHARS_PER_TOKEN = 4
+
+# Marks the end of a stream_pages queue
+_END_OF_PAGES = object()
+
+# stream_pages producer tasks still running
+_producers: Set[asyncio.Task] = set()
 
 
 class PDFParser:
@@ -10,6 +28,58 @@ class PDFParser:
     Uses pdfplumber for text and tables, and OCR for images.
     """
     
+    def __init__(self, table_strategy: str = None, table_format: str = None, ocr_mode: str = None):
+        self.table_strategy = table_strategy or settings.table_strategy
+        self.table_format = table_format or settings.table_format
+        self.ocr_mode = ocr_mode or settings.ocr_mode
+        self.table_settings = {
+            "vertical_strategy": self.table_strategy,
+            "horizontal_strategy": self.table_strategy,
+        }
+    
+    def _may_contain_table(self, page) -> bool:
+        """
+        Cheap pre-check whether table detection is worth running on a page.
+        Line-based strategies need ruling geometry, so pages without any
+        lines, rectangles or curves (plain prose) are skipped.
+        
+        Args:
+            page: pdfplumber page
+            
+        Returns:
+            True if table extraction should run on this page
+        """
+        if self.table_strategy == "none":
+            return False
+        if self.table_strategy not in RULED_TABLE_STRATEGIES:
+            return True
+        objects = page.objects
+        return bool(objects.get("line") or objects.get("rect") or objects.get("curve"))
+    
+    def estimate_workload(self, pdf_bytes: bytes, sample_pages: int = 3) -> tuple:
+        """
+        Cheaply estimate parsing work without extracting the whole document.
+        Only the page tree and the characters of the first few pages are read.
+        
+        Args:
+            pdf_bytes: PDF file content as bytes
+            sample_pages: Number of leading pages checked for a text layer
+            
+        Returns:
+            Tuple of (page count, whether OCR will likely be needed,
+            estimated tokens of text extrapolated from the sampled pages)
+        """
+        try:
+            with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+                page_count = len(pdf.pages)
+                sampled = pdf.pages[:sample_pages]
+                sampled_chars = sum(len(page.chars) for page in sampled)
+                estimated_tokens = sampled_chars * page_count // max(len(sampled), 1) // CHARS_PER_TOKEN
+                return page_count, page_count > 0 and not sampled_chars, estimated_tokens
+        except Exception:
+            # Unreadable PDFs fail fast in parse_pdf; assume the worst-case size
+            return settings.max_pages, False, 0
+    
     async def parse_pdf(self, pdf_bytes: bytes) -> str:
         """
         Parse PDF and extract all text content.
@@ -21,74 +91,361 @@ class PDFParser:
         Returns:
             Extracted text content as string
         """
-        text_parts = []
+        return "\n".join(self.iter_pages(pdf_bytes))
+    
+    async def stream_pages(
+        self,
+        pdf_bytes: bytes,
+        scheduler: Optional[JobScheduler] = None,
+        cost: float = 1.0
+    ) -> AsyncIterator[str]:
+        """
+        Parse a PDF in worker threads and yield text blocks as they are extracted.
+        At most parse_queue_pages blocks are buffered ahead of the consumer, so a
+        slow consumer pauses parsing instead of accumulating the whole document.
+        Each block is parsed by a background task that takes the scheduler slot
+        on the event loop and only then hands the page to a thread.
+        
+        Args:
+            pdf_bytes: PDF file content as bytes
+            scheduler: CPU scheduler; a slot is held while each block is parsed,
+                so cheaper documents can go ahead between pages
+            cost: Estimated CPU cost of the document (for the scheduler)
+            
+        Yields:
+            Text blocks in document order (see iter_pages)
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        free_slots = asyncio.Semaphore(settings.parse_queue_pages)
+        stopped = asyncio.Event()
         
+        async def produce():
+            blocks = self.iter_pages(pdf_bytes)
+            in_flight = None
+            
+            def close_blocks(future=None):
+                if future is not None and not future.cancelled():
+                    future.exception()
+                blocks.close()
+            
+            try:
+                while True:
+                    await free_slots.acquire()
+                    if stopped.is_set():
+                        return
+                    # Slots are taken on the event loop, so a worker thread never waits for one
+                    if scheduler is not None:
+                        await scheduler.acquire(cost)
+                    in_flight = loop.run_in_executor(None, next, blocks, _END_OF_PAGES)
+                    if scheduler is not None:
+                        in_flight.add_done_callback(lambda _: scheduler.release())
+                    # Shielded so the parser is not closed while a page is still being parsed
+                    block = await asyncio.shield(in_flight)
+                    if block is _END_OF_PAGES:
+                        break
+                    queue.put_nowait(block)
+                item = _END_OF_PAGES
+            except Exception as e:
+                item = e
+            finally:
+                if in_flight is not None and not in_flight.done():
+                    in_flight.add_done_callback(close_blocks)
+                else:
+                    close_blocks()
+            if not stopped.is_set():
+                queue.put_nowait(item)
+        
+        producer = asyncio.create_task(produce())
+        # Keep a reference until the producer has stopped after the last page
+        _producers.add(producer)
+        producer.add_done_callback(_producers.discard)
         try:
-            # First, try to extract text directly from PDF
-            with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-                # Check if PDF has pages
-                if len(pdf.pages) == 0:
-                    return "PDF file is empty (no pages found)"
-                
-                for page_num, page in enumerate(pdf.pages, 1):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_parts.append(f"--- Page {page_num} ---\n{page_text}\n")
-                    
-                    # Extract tables
-                    tables = page.extract_tables()
-                    for table_num, table in enumerate(tables, 1):
-                        if table:
-                            table_text = self._format_table(table)
-                            text_parts.append(f"\n--- Table {table_num} on Page {page_num} ---\n{table_text}\n")
-            
-            # If we got good text content, return it
-            full_text = "\n".join(text_parts)
-            if len(full_text.strip()) > 100:
-                return full_text
+            while True:
+                item = await queue.get()
+                if item is _END_OF_PAGES:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                free_slots.release()
+                yield item
+        finally:
+            # Unblock the producer so it can stop after the current page
+            stopped.set()
+            free_slots.release()
+    
+    def iter_pages(self, pdf_bytes: bytes) -> Iterator[str]:
+        """
+        Extract text blocks (pages and tables) one at a time.
+        Blocks are held back until the text layer proves usable (over 100
+        characters); a PDF without one is OCRed instead.
+        
+        Args:
+            pdf_bytes: PDF file content as bytes
+            
+        Yields:
+            Text blocks in document order
+        """
+        try:
+            held = []
+            streaming = False
+            for block in self._iter_text_layer(pdf_bytes):
+                if streaming:
+                    yield block
+                    continue
+                held.append(block)
+                if len("\n".join(held).strip()) > 100:
+                    # Good text content - stream from here on
+                    streaming = True
+                    yield from held
+                    held = []
+            if streaming:
+                return
             
             # If text extraction was poor, try OCR on images (fallback)
+            ocr_found = False
             try:
-                images = convert_from_bytes(pdf_bytes, dpi=200)
-                ocr_text_parts = []
-                
-                for page_num, image in enumerate(images, 1):
-                    try:
-                        ocr_text = pytesseract.image_to_string(image, lang='eng')
-                        if ocr_text.strip():
-                            ocr_text_parts.append(f"--- Page {page_num} (OCR) ---\n{ocr_text}\n")
-                    except Exception:
-                        # Skip OCR for this page if it fails
-                        continue
-                
-                if ocr_text_parts:
-                    return "\n".join(ocr_text_parts)
+                for ocr_block in self._ocr_pages(pdf_bytes):
+                    ocr_found = True
+                    yield ocr_block
             except Exception:
                 # OCR not available or failed, return what we have
                 pass
+            if ocr_found:
+                return
             
-            return full_text if full_text else "Could not extract text from PDF"
+            if held:
+                yield from held
+            else:
+                yield "Could not extract text from PDF"
             
         except Exception as e:
             raise Exception(f"Error parsing PDF: {str(e)}")
     
+    def _iter_text_layer(self, pdf_bytes: bytes) -> Iterator[str]:
+        """
+        Extract page text and tables page by page.
+        
+        Args:
+            pdf_bytes: PDF file content as bytes
+            
+        Yields:
+            Page text blocks, each followed by the page's table blocks
+        """
+        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+            # Check if PDF has pages
+            if len(pdf.pages) == 0:
+                yield "PDF file is empty (no pages found)"
+                return
+            
+            # In "images" mode embedded images are OCRed on every page
+            pdfium_doc = pypdfium2.PdfDocument(pdf_bytes) if self.ocr_mode == "images" else None
+            try:
+                for page_num, page in enumerate(pdf.pages, 1):
+                    if pdfium_doc is not None and page.images:
+                        pdfium_page = pdfium_doc[page_num - 1]
+                        try:
+                            page_text = self._extract_text_with_ocr(page, pdfium_page)
+                        finally:
+                            pdfium_page.close()
+                    else:
+                        page_text = page.extract_text()
+                    if page_text:
+                        yield f"--- Page {page_num} ---\n{page_text}\n"
+                    
+                    # Extract tables (only on pages that can contain one)
+                    if self._may_contain_table(page):
+                        tables = page.extract_tables(self.table_settings)
+                        for table_num, table in enumerate(tables, 1):
+                            if table:
+                                table_text = self._format_table(table)
+                                yield f"\n--- Table {table_num} on Page {page_num} ---\n{table_text}\n"
+                    
+                    # Drop parsed layout objects so memory stays flat on long documents
+                    page.flush_cache()
+            finally:
+                # Native pdfium memory is not freed by the garbage collector reliably
+                if pdfium_doc is not None:
+                    pdfium_doc.close()
+    
+    def _ocr_pages(self, pdf_bytes: bytes) -> Iterator[str]:
+        """
+        OCR a PDF without a usable text layer.
+        Only embedded image regions are rendered; pages without images, or
+        whose images yield no text, are rendered whole as a last resort.
+        
+        Args:
+            pdf_bytes: PDF file content as bytes
+            
+        Yields:
+            Per-page OCR text blocks
+        """
+        pdfium_doc = pypdfium2.PdfDocument(pdf_bytes)
+        try:
+            with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+                for page_num, page in enumerate(pdf.pages, 1):
+                    try:
+                        pdfium_page = pdfium_doc[page_num - 1]
+                        try:
+                            ocr_text = self._ocr_page(page, pdfium_page)
+                        finally:
+                            pdfium_page.close()
+                    except Exception:
+                        # Skip OCR for this page if it fails
+                        continue
+                    if ocr_text.strip():
+                        yield f"--- Page {page_num} (OCR) ---\n{ocr_text}\n"
+                    page.flush_cache()
+        finally:
+            # Also runs when the consumer stops early and the generator is closed
+            pdfium_doc.close()
+    
+    def _ocr_page(self, page, pdfium_page) -> str:
+        """
+        OCR one page, rendering only its image regions when that finds any text.
+        
+        Args:
+            page: pdfplumber page
+            pdfium_page: The same page opened with pypdfium2 (for rendering)
+            
+        Returns:
+            OCR text of the page
+        """
+        ocr_text = self._extract_text_with_ocr(page, pdfium_page) if page.images else ""
+        if not ocr_text.strip():
+            # No images, only icon-sized ones, or text drawn as vector paths
+            image = pdfium_page.render(scale=settings.ocr_page_dpi / 72, grayscale=True).to_pil()
+            ocr_text = self._ocr_image(image)
+        return ocr_text
+    
+    def _ocr_dpi(self, page, image: dict, width: float, height: float) -> float:
+        """
+        Choose the resolution to render an image region at for OCR.
+        
+        Args:
+            page: pdfplumber page
+            image: pdfplumber image object
+            width: Visible width of the image in points
+            height: Visible height of the image in points
+            
+        Returns:
+            Render resolution in DPI
+        """
+        # Render at the image's own resolution, within sane bounds
+        source_width = (image.get("srcsize") or (0, 0))[0]
+        native_dpi = source_width / (width / 72) if source_width else settings.ocr_page_dpi
+        dpi = min(max(native_dpi, settings.ocr_min_dpi), settings.ocr_max_dpi)
+        if width * height >= settings.ocr_page_image_ratio * page.width * page.height:
+            # Scanned pages hold body-sized text; more pixels only cost OCR time
+            dpi = min(dpi, settings.ocr_page_dpi)
+        return dpi
+    
+    def _extract_text_with_ocr(self, page, pdfium_page) -> str:
+        """
+        Extract page text and OCR its embedded images, merged in reading order.
+        
+        Args:
+            page: pdfplumber page
+            pdfium_page: The same page opened with pypdfium2 (for rendering)
+            
+        Returns:
+            Page text with OCR text placed where each image appears
+        """
+        blocks = [(line["top"], line["x0"], line["text"]) for line in page.extract_text_lines()]
+        
+        for image in page.images:
+            x0, top = max(image["x0"], 0), max(image["top"], 0)
+            x1, bottom = min(image["x1"], page.width), min(image["bottom"], page.height)
+            if min(x1 - x0, bottom - top) < settings.ocr_min_image_size_pt:
+                # Skip icons, logos and decorations
+                continue
+            
+            dpi = self._ocr_dpi(page, image, x1 - x0, bottom - top)
+            try:
+                rendered = pdfium_page.render(
+                    scale=dpi / 72,
+                    crop=(x0, page.height - bottom, page.width - x1, top),
+                    grayscale=True
+                ).to_pil()
+                ocr_text = self._ocr_image(rendered).strip()
+            except Exception:
+                continue
+            if ocr_text:
+                blocks.append((top, x0, ocr_text))
+        
+        blocks.sort(key=lambda block: (round(block[0]), block[1]))
+        return "\n".join(text for _, _, text in blocks)
+    
+    def _ocr_image(self, image: Image.Image) -> str:
+        """
+        OCR a grayscale image, binarizing it first if enabled.
+        
+        Args:
+            image: Grayscale PIL image
+            
+        Returns:
+            Recognized text
+        """
+        if settings.ocr_binarize:
+            threshold = self._otsu_threshold(image)
+            image = image.point(lambda value: 255 if value > threshold else 0)
+        return pytesseract.image_to_string(image, lang='eng')
+    
+    @staticmethod
+    def _otsu_threshold(image: Image.Image) -> int:
+        """Compute Otsu's binarization threshold from the image histogram"""
+        histogram = image.histogram()[:256]
+        total = sum(histogram)
+        weighted_total = sum(i * count for i, count in enumerate(histogram))
+        
+        background_count = 0
+        background_sum = 0
+        best_threshold, best_variance = 127, 0.0
+        for value, count in enumerate(histogram):
+            background_count += count
+            if background_count == 0:
+                continue
+            foreground_count = total - background_count
+            if foreground_count == 0:
+                break
+            background_sum += value * count
+            background_mean = background_sum / background_count
+            foreground_mean = (weighted_total - background_sum) / foreground_count
+            variance = background_count * foreground_count * (background_mean - foreground_mean) ** 2
+            if variance > best_variance:
+                best_threshold, best_variance = value, variance
+        return best_threshold
+    
     def _format_table(self, table: list) -> str:
         """
-        Format a table structure into readable text.
+        Format a table structure into compact text.
+        Columns that are empty in every row are dropped.
         
         Args:
             table: Table data as list of rows
             
         Returns:
-            Formatted table as string with pipe separators
+            Formatted table as markdown or CSV (see table_format setting)
         """
-        if not table:
+        normalized = (
+            [" ".join(str(cell).split()) if cell is not None else "" for cell in row]
+            for row in table if row
+        )
+        # Filter after normalizing, so rows of whitespace-only cells are dropped too
+        rows = [row for row in normalized if any(row)]
+        if not rows:
             return ""
         
-        formatted_rows = []
-        for row in table:
-            if row:
-                clean_row = [str(cell) if cell is not None else "" for cell in row]
-                formatted_rows.append(" | ".join(clean_row))
+        width = max(len(row) for row in rows)
+        rows = [row + [""] * (width - len(row)) for row in rows]
+        keep = [col for col in range(width) if any(row[col] for row in rows)]
+        rows = [[row[col] for col in keep] for row in rows]
+        
+        if self.table_format == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator="\n").writerows(rows)
+            return buffer.getvalue().rstrip("\n")
         
+        formatted_rows = ["| " + " | ".join(cell.replace("|", "\\|") for cell in row) + " |" for row in rows]
+        formatted_rows.insert(1, "|" + "---|" * len(keep))
         return "\n".join(formatted_rows)
@@ -0,0 +1,131 @@
+import time
+import random
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"Circuit breaker is open, retry in {retry_after:.0f}s")
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    After failure_threshold transient failures in a row the circuit opens and
+    calls fail fast for reset_timeout seconds. Then a single trial call is let
+    through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """Current breaker state"""
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_call(self) -> bool:
+        """
+        Check whether a call may proceed.
+
+        Returns:
+            True if the call is the half-open trial
+
+        Raises:
+            CircuitOpenError: If the circuit is open or a half-open trial is running
+        """
+        state = self.state
+        if state == self.CLOSED:
+            return False
+        if state == self.HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+        raise CircuitOpenError(max(remaining, 1.0))
+
+    def record_success(self):
+        """Close the circuit after a successful call"""
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_cancelled(self, is_trial: bool):
+        """
+        Give up a call without an outcome (e.g. cancelled).
+
+        Args:
+            is_trial: Whether the call was the half-open trial, which is freed
+        """
+        if is_trial:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Count a transient failure and open the circuit if over threshold"""
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """
+    Exponential backoff with full jitter.
+
+    Args:
+        attempt: Zero-based retry attempt
+        base_delay: Delay for the first retry in seconds
+        max_delay: Upper bound for the delay in seconds
+
+    Returns:
+        Delay in seconds
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """
+    Parse Retry-After (seconds or HTTP date) or retry-after-ms from response headers.
+
+    Args:
+        headers: Response headers mapping (case-insensitive)
+
+    Returns:
+        Delay in seconds, or None if not present or invalid
+    """
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(float(retry_after_ms) / 1000, 0.0)
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
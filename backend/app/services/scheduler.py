@@ -0,0 +1,140 @@
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from typing import Dict, List, Tuple
+from app.core.config import settings
+from app.services.llm_transport import LatencyTracker
+
+# Rough text yield of a scanned page, used when there is no text layer to sample
+OCR_PAGE_TOKENS = 400
+
+
+def estimate_job_costs(
+    page_count: int,
+    needs_ocr: bool,
+    estimated_tokens: int,
+    chunk_tokens: int = 10000
+) -> Tuple[float, float]:
+    """
+    Estimate how much CPU and API work a document needs.
+    CPU cost is in pages parsed (OCR pages count admission_ocr_page_cost
+    extra); API cost is in expected calls (chunk summaries plus the final one).
+
+    Args:
+        page_count: Number of pages
+        needs_ocr: Whether the PDF has no text layer and will be OCRed
+        estimated_tokens: Estimated tokens of extracted text
+        chunk_tokens: Tokens per chunk summary call
+
+    Returns:
+        Tuple of (CPU cost, API cost)
+    """
+    if needs_ocr:
+        estimated_tokens = max(estimated_tokens, page_count * OCR_PAGE_TOKENS)
+    cpu_cost = page_count * ((1 + settings.admission_ocr_page_cost) if needs_ocr else 1)
+    api_cost = 1 + estimated_tokens / chunk_tokens
+    return max(cpu_cost, 1.0), api_cost
+
+
+class JobScheduler:
+    """
+    Shortest-job-first scheduler for a fixed number of slots (worker threads
+    or concurrent API calls). Waiters are served cheapest first; every second
+    spent waiting lowers a job's cost by aging_per_second, so large jobs
+    cannot be starved by a steady stream of small ones.
+    """
+
+    def __init__(self, name: str, capacity: int, aging_per_second: float, small_job_cost: float):
+        self.name = name
+        self.capacity = capacity
+        self.aging_per_second = aging_per_second
+        self.small_job_cost = small_job_cost
+        self.running = 0
+        # Heap of [priority, sequence, cost, waiter]; cancelled waiters are skipped when popped
+        self._queue: List[list] = []
+        self._sequence = itertools.count()
+        self.wait_times: Dict[str, LatencyTracker] = {"small": LatencyTracker(), "large": LatencyTracker()}
+        self.acquired: Dict[str, int] = {"small": 0, "large": 0}
+
+    @asynccontextmanager
+    async def slot(self, cost: float):
+        """
+        Hold one slot while the context is active.
+
+        Args:
+            cost: Estimated cost of the job the work belongs to
+        """
+        await self.acquire(cost)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, cost: float):
+        """Wait for a slot; cheaper (or older) jobs are granted first"""
+        enqueued_at = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        # cost - aging * (now - enqueued_at) orders the same way at any "now"
+        priority = cost + self.aging_per_second * enqueued_at
+        heapq.heappush(self._queue, [priority, next(self._sequence), cost, waiter])
+        self._grant()
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as we were cancelled; hand it back
+                self.release()
+            raise
+
+        size = "small" if cost <= self.small_job_cost else "large"
+        self.acquired[size] += 1
+        self.wait_times[size].record(time.monotonic() - enqueued_at)
+
+    def try_acquire(self) -> bool:
+        """
+        Take a free slot without waiting, for optional work (e.g. hedged requests).
+        Never takes a slot that a queued job could use.
+
+        Returns:
+            True if a slot was taken; it must be given back with release()
+        """
+        self._grant()
+        if self.running >= self.capacity:
+            return False
+        self.running += 1
+        return True
+
+    def release(self):
+        """Free a slot and grant it to the next waiter"""
+        self.running = max(self.running - 1, 0)
+        self._grant()
+
+    def _grant(self):
+        """Hand free slots to the highest priority waiters"""
+        while self._queue and self.running < self.capacity:
+            waiter = heapq.heappop(self._queue)[3]
+            if waiter.done():
+                continue
+            self.running += 1
+            waiter.set_result(None)
+
+    def snapshot(self) -> dict:
+        """Get slot usage and queue-wait percentiles (seconds) for small and large jobs"""
+        waits = {}
+        for size, tracker in self.wait_times.items():
+            waits[size] = {
+                "acquired": self.acquired[size],
+                **{
+                    f"p{q}_wait_seconds": round(value, 4) if value is not None else None
+                    for q, value in ((q, tracker.percentile(q)) for q in (50, 95, 99))
+                }
+            }
+        return {
+            "capacity": self.capacity,
+            "running": self.running,
+            "queued": sum(1 for entry in self._queue if not entry[3].done()),
+            **waits
+        }
@@ -0,0 +1,194 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+import aiosqlite
+from typing import Awaitable, Callable, Dict, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightService:
+    """
+    Coalesces concurrent computations for the same key into a single run.
+    Within a worker, callers share one asyncio task. Across uvicorn workers,
+    a lock table in SQLite elects one leader; the others poll for its result.
+    Coordination is best-effort: if the database fails (e.g. it is locked),
+    the caller computes its own result instead of failing.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "documents.db",
+        lock_ttl: float = None,
+        poll_interval: float = None,
+        result_ttl: float = None
+    ):
+        self.db_path = db_path
+        self.lock_ttl = lock_ttl or settings.single_flight_lock_ttl_seconds
+        self.poll_interval = poll_interval or settings.single_flight_poll_interval_seconds
+        self.result_ttl = result_ttl or settings.single_flight_result_ttl_seconds
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+
+    async def initialize(self):
+        """Initialize lock and result tables (runs once, on warm-up or first use)"""
+        if self._initialized:
+            return
+        async with self._init_lock:
+            if self._initialized:
+                return
+            async with aiosqlite.connect(self.db_path) as db:
+                await db.execute("""
+                    CREATE TABLE IF NOT EXISTS inflight_locks (
+                        key TEXT PRIMARY KEY,
+                        owner TEXT NOT NULL,
+                        acquired_at REAL NOT NULL
+                    )
+                """)
+                await db.execute("""
+                    CREATE TABLE IF NOT EXISTS inflight_results (
+                        key TEXT PRIMARY KEY,
+                        result TEXT NOT NULL,
+                        completed_at REAL NOT NULL
+                    )
+                """)
+                await db.commit()
+            self._initialized = True
+
+    async def run(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[str]],
+        shareable: Optional[Callable[[str], bool]] = None
+    ) -> str:
+        """
+        Run compute() once for all concurrent callers with the same key.
+
+        Args:
+            key: Coalescing key (e.g. content hash plus model)
+            compute: Coroutine factory producing the result
+            shareable: Whether a result may be published to other workers for
+                result_ttl (e.g. not a degraded fallback); all results are by default
+
+        Returns:
+            Result shared by every caller of this key
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run_across_workers(key, compute, shareable))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        # Shield so a disconnecting caller doesn't cancel work others wait for
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        """Drop a finished task from the in-flight table"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away
+            task.exception()
+
+    async def _run_across_workers(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[str]],
+        shareable: Optional[Callable[[str], bool]]
+    ) -> str:
+        """Become the leader for key or wait for the worker that is"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_ttl
+
+        while True:
+            try:
+                await self.initialize()
+                result = await self._get_result(key)
+                if result is not None:
+                    return result
+                acquired = await self._try_acquire(key)
+            except aiosqlite.Error as e:
+                logger.warning("Single-flight coordination failed, computing without it: %s", e)
+                return await compute()
+
+            if acquired:
+                try:
+                    result = await compute()
+                except BaseException:
+                    await self._release(key)
+                    raise
+                if shareable is None or shareable(result):
+                    await self._complete(key, result)
+                else:
+                    # Waiting workers compute their own result
+                    await self._release(key)
+                return result
+
+            if loop.time() > deadline:
+                # Leader is taking too long; don't wait forever
+                return await compute()
+
+            await asyncio.sleep(self.poll_interval)
+
+    async def _get_result(self, key: str):
+        """Get a recently completed result for key, if any"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                SELECT result FROM inflight_results
+                WHERE key = ? AND completed_at >= ?
+            """, (key, time.time() - self.result_ttl))
+            row = await cursor.fetchone()
+            return row[0] if row else None
+
+    async def _try_acquire(self, key: str) -> bool:
+        """Try to take the lock for key, expiring locks of crashed workers"""
+        now = time.time()
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                "DELETE FROM inflight_locks WHERE acquired_at < ?",
+                (now - self.lock_ttl,)
+            )
+            await db.execute(
+                "DELETE FROM inflight_results WHERE completed_at < ?",
+                (now - self.result_ttl,)
+            )
+            cursor = await db.execute("""
+                INSERT OR IGNORE INTO inflight_locks (key, owner, acquired_at)
+                VALUES (?, ?, ?)
+            """, (key, self.owner, now))
+            acquired = cursor.rowcount == 1
+            await db.commit()
+            return acquired
+
+    async def _complete(self, key: str, result: str):
+        """Publish the result for waiting workers and release the lock"""
+        try:
+            async with aiosqlite.connect(self.db_path) as db:
+                await db.execute("""
+                    INSERT OR REPLACE INTO inflight_results (key, result, completed_at)
+                    VALUES (?, ?, ?)
+                """, (key, result, time.time()))
+                await db.execute(
+                    "DELETE FROM inflight_locks WHERE key = ? AND owner = ?",
+                    (key, self.owner)
+                )
+                await db.commit()
+        except aiosqlite.Error as e:
+            # Waiting workers compute themselves once the lock expires
+            logger.warning("Single-flight result publish failed: %s", e)
+
+    async def _release(self, key: str):
+        """Release the lock without a result so another worker can retry"""
+        try:
+            async with aiosqlite.connect(self.db_path) as db:
+                await db.execute(
+                    "DELETE FROM inflight_locks WHERE key = ? AND owner = ?",
+                    (key, self.owner)
+                )
+                await db.commit()
+        except aiosqlite.Error as e:
+            logger.warning("Single-flight lock release failed: %s", e)
@@ -1,7 +1,8 @@
 import os
 import uuid
+import asyncio
 import aiosqlite
-from typing import List, Optional
+from typing import List, Optional, Set
 from datetime import datetime
 from pathlib import Path
 from app.models.document import Document
@@ -20,36 +21,76 @@ class StorageService:
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(exist_ok=True)
         self.max_history = settings.max_history
-        self._init_db_sync()
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
     
-    def _init_db_sync(self):
-        """Initialize database schema (sync for startup)"""
-        import sqlite3
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
+    async def initialize(self):
+        """Initialize database schema (runs once, on warm-up or first use)"""
+        if self._initialized:
+            return
+        async with self._init_lock:
+            if self._initialized:
+                return
+            async with aiosqlite.connect(self.db_path) as db:
+                await self._create_schema(db)
+                await db.commit()
+            self._initialized = True
+    
+    async def _create_schema(self, db: aiosqlite.Connection):
+        """Create tables and indexes if they don't exist"""
+        await db.execute("""
             CREATE TABLE IF NOT EXISTS documents (
                 id TEXT PRIMARY KEY,
                 filename TEXT NOT NULL,
                 file_path TEXT,
                 summary TEXT NOT NULL,
+                summary_mode TEXT NOT NULL DEFAULT 'llm',
                 file_size_mb REAL NOT NULL,
                 uploaded_at TIMESTAMP NOT NULL
             )
         """)
-        cursor.execute("""
+        # Databases created before summary modes were recorded hold only LLM summaries
+        cursor = await db.execute("PRAGMA table_info(documents)")
+        if "summary_mode" not in {row[1] for row in await cursor.fetchall()}:
+            await db.execute("ALTER TABLE documents ADD COLUMN summary_mode TEXT NOT NULL DEFAULT 'llm'")
+        await db.execute("""
             CREATE INDEX IF NOT EXISTS idx_uploaded_at 
             ON documents(uploaded_at DESC)
         """)
-        conn.commit()
-        conn.close()
+        # Bulk (Batch API) results; kept in full, not trimmed to max_history
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS bulk_summaries (
+                id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                source_path TEXT NOT NULL,
+                summary TEXT,
+                error TEXT,
+                file_size_mb REAL,
+                created_at TIMESTAMP NOT NULL
+            )
+        """)
+        # Submitted Batch API jobs, so an interrupted bulk run can pick them up again
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS bulk_batches (
+                batch_id TEXT PRIMARY KEY,
+                payload_hash TEXT NOT NULL,
+                request_count INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                created_at TIMESTAMP NOT NULL
+            )
+        """)
+        await db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_bulk_batches_payload
+            ON bulk_batches(payload_hash)
+        """)
     
     async def add_to_history(
         self, 
         filename: str, 
         summary: str, 
         file_size: float,
-        file_content: Optional[bytes] = None
+        file_content: Optional[bytes] = None,
+        summary_mode: str = "llm"
     ) -> HistoryItem:
         """
         Add a new document to history.
@@ -61,6 +102,7 @@ class StorageService:
             summary: Generated summary
             file_size: File size in MB
             file_content: Optional PDF file content to save
+            summary_mode: How the summary was produced (llm or extractive)
             
         Returns:
             HistoryItem with document information
@@ -77,19 +119,21 @@ class StorageService:
             filename=filename,
             file_path=file_path,
             summary=summary,
+            summary_mode=summary_mode,
             file_size_mb=file_size,
             uploaded_at=uploaded_at
         )
         
         async with aiosqlite.connect(self.db_path) as db:
             await db.execute("""
-                INSERT INTO documents (id, filename, file_path, summary, file_size_mb, uploaded_at)
-                VALUES (?, ?, ?, ?, ?, ?)
+                INSERT INTO documents (id, filename, file_path, summary, summary_mode, file_size_mb, uploaded_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
             """, (
                 document.id,
                 document.filename,
                 document.file_path,
                 document.summary,
+                document.summary_mode,
                 document.file_size_mb,
                 document.uploaded_at.isoformat()
             ))
@@ -102,10 +146,110 @@ class StorageService:
             id=document.id,
             filename=document.filename,
             summary=document.summary,
+            summary_mode=document.summary_mode,
             uploaded_at=document.uploaded_at,
             file_size_mb=document.file_size_mb
         )
     
+    async def add_bulk_result(
+        self,
+        source_path: str,
+        summary: Optional[str],
+        file_size: Optional[float],
+        error: Optional[str] = None
+    ) -> str:
+        """
+        Store the outcome of summarizing one file in bulk mode.
+        Unlike history, bulk results are never trimmed.
+        
+        Args:
+            source_path: Path of the summarized PDF
+            summary: Generated summary (None if the file failed)
+            file_size: File size in MB (None if the file could not be read)
+            error: Failure reason, if any
+            
+        Returns:
+            ID of the stored result
+        """
+        result_id = str(uuid.uuid4())
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                INSERT INTO bulk_summaries (id, filename, source_path, summary, error, file_size_mb, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                result_id,
+                Path(source_path).name,
+                source_path,
+                summary,
+                error,
+                file_size,
+                datetime.now().isoformat()
+            ))
+            await db.commit()
+        return result_id
+    
+    async def get_summarized_bulk_paths(self) -> Set[str]:
+        """
+        Get source paths that already have a successful bulk result.
+        
+        Returns:
+            Set of source paths
+        """
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                SELECT DISTINCT source_path FROM bulk_summaries
+                WHERE summary IS NOT NULL AND error IS NULL
+            """)
+            return {row[0] for row in await cursor.fetchall()}
+    
+    async def find_bulk_batch(self, payload_hash: str) -> Optional[str]:
+        """
+        Find a submitted batch with the same input that can still be used.
+        
+        Args:
+            payload_hash: SHA-256 of the batch input file
+            
+        Returns:
+            Batch ID, or None if no usable batch exists
+        """
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute("""
+                SELECT batch_id FROM bulk_batches
+                WHERE payload_hash = ? AND status NOT IN ('failed', 'expired', 'cancelled')
+                ORDER BY created_at DESC
+                LIMIT 1
+            """, (payload_hash,))
+            row = await cursor.fetchone()
+            return row[0] if row else None
+    
+    async def record_bulk_batch(self, batch_id: str, payload_hash: str, request_count: int):
+        """
+        Record a submitted batch.
+        
+        Args:
+            batch_id: Batch API job ID
+            payload_hash: SHA-256 of the batch input file
+            request_count: Number of requests in the batch
+        """
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("""
+                INSERT OR REPLACE INTO bulk_batches (batch_id, payload_hash, request_count, status, created_at)
+                VALUES (?, ?, ?, 'submitted', ?)
+            """, (batch_id, payload_hash, request_count, datetime.now().isoformat()))
+            await db.commit()
+    
+    async def update_bulk_batch_status(self, batch_id: str, status: str):
+        """
+        Store the latest known status of a batch.
+        
+        Args:
+            batch_id: Batch API job ID
+            status: Batch status (e.g. completed, failed)
+        """
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("UPDATE bulk_batches SET status = ? WHERE batch_id = ?", (status, batch_id))
+            await db.commit()
+    
     def _save_file(self, doc_id: str, filename: str, content: bytes) -> str:
         """
         Save PDF file to disk and return file path.
@@ -166,7 +310,7 @@ class StorageService:
         async with aiosqlite.connect(self.db_path) as db:
             db.row_factory = aiosqlite.Row
             cursor = await db.execute("""
-                SELECT id, filename, file_path, summary, file_size_mb, uploaded_at
+                SELECT id, filename, file_path, summary, summary_mode, file_size_mb, uploaded_at
                 FROM documents
                 ORDER BY uploaded_at DESC
                 LIMIT ?
@@ -179,6 +323,7 @@ class StorageService:
                     filename=row["filename"],
                     file_path=row["file_path"],
                     summary=row["summary"],
+                    summary_mode=row["summary_mode"],
                     file_size_mb=row["file_size_mb"],
                     uploaded_at=datetime.fromisoformat(row["uploaded_at"])
                 )
@@ -190,6 +335,7 @@ class StorageService:
                     id=doc.id,
                     filename=doc.filename,
                     summary=doc.summary,
+                    summary_mode=doc.summary_mode,
                     uploaded_at=doc.uploaded_at,
                     file_size_mb=doc.file_size_mb
                 )
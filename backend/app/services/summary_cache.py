@@ -0,0 +1,162 @@
+import re
+import time
+import asyncio
+import hashlib
+import logging
+import aiosqlite
+from typing import Dict, List, Optional
+from app.core.config import settings
+
+# Page/table markers added by PDFParser; page numbers shift between revisions
+PAGE_MARKER_PATTERN = re.compile(r"---[^\n]*?\bPage \d+[^\n]*?---")
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_chunk_text(text: str) -> str:
+    """
+    Normalize chunk text for cache keys: drop page markers and collapse whitespace.
+
+    Args:
+        text: Chunk text
+
+    Returns:
+        Normalized text
+    """
+    return " ".join(PAGE_MARKER_PATTERN.sub(" ", text).split())
+
+
+class SummaryCache:
+    """
+    Persistent cache of chunk summaries shared across documents and revisions.
+    Entries live in SQLite and are evicted least-recently-used first once the
+    total cached size exceeds max_bytes. Lookups and writes are best-effort:
+    database errors are logged and treated as a miss.
+    """
+
+    def __init__(self, db_path: str = "documents.db", max_bytes: Optional[int] = None):
+        self.db_path = db_path
+        self.max_bytes = max_bytes or int(settings.chunk_cache_max_mb * 1024 * 1024)
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+
+    @staticmethod
+    def make_key(text: str, model: str, prompt_version: str) -> str:
+        """
+        Build a cache key from normalized chunk text, model and prompt version.
+
+        Args:
+            text: Chunk text
+            model: Model name
+            prompt_version: Version of the chunk summary prompt
+
+        Returns:
+            Hex digest key
+        """
+        digest = hashlib.sha256()
+        for part in (model, prompt_version, normalize_chunk_text(text)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    async def initialize(self):
+        """Initialize cache table (runs once, on warm-up or first use)"""
+        if self._initialized:
+            return
+        async with self._init_lock:
+            if self._initialized:
+                return
+            async with aiosqlite.connect(self.db_path) as db:
+                await db.execute("""
+                    CREATE TABLE IF NOT EXISTS chunk_summaries (
+                        key TEXT PRIMARY KEY,
+                        summary TEXT NOT NULL,
+                        size_bytes INTEGER NOT NULL,
+                        last_used_at REAL NOT NULL
+                    )
+                """)
+                await db.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_chunk_summaries_last_used
+                    ON chunk_summaries(last_used_at)
+                """)
+                await db.commit()
+            self._initialized = True
+
+    async def get_many(self, keys: List[str]) -> Dict[str, str]:
+        """
+        Look up cached summaries and mark hits as recently used.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Mapping of key to summary for keys that are cached
+        """
+        if not keys:
+            return {}
+        try:
+            return await self._get_many(keys)
+        except aiosqlite.Error as e:
+            logger.warning("Chunk summary cache lookup failed: %s", e)
+            return {}
+
+    async def _get_many(self, keys: List[str]) -> Dict[str, str]:
+        """Look up keys and touch hits (see get_many)"""
+        await self.initialize()
+        placeholders = ",".join("?" for _ in keys)
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute(
+                f"SELECT key, summary FROM chunk_summaries WHERE key IN ({placeholders})",
+                list(keys)
+            )
+            found = {row[0]: row[1] for row in await cursor.fetchall()}
+            if found:
+                hit_placeholders = ",".join("?" for _ in found)
+                await db.execute(
+                    f"UPDATE chunk_summaries SET last_used_at = ? WHERE key IN ({hit_placeholders})",
+                    [time.time(), *found]
+                )
+                await db.commit()
+            return found
+
+    async def put(self, key: str, summary: str):
+        """
+        Store a summary and evict least-recently-used entries over the size limit.
+
+        Args:
+            key: Cache key
+            summary: Chunk summary
+        """
+        try:
+            await self.initialize()
+            async with aiosqlite.connect(self.db_path) as db:
+                await db.execute("""
+                    INSERT OR REPLACE INTO chunk_summaries (key, summary, size_bytes, last_used_at)
+                    VALUES (?, ?, ?, ?)
+                """, (key, summary, len(summary.encode("utf-8")), time.time()))
+                await self._evict(db)
+                await db.commit()
+        except aiosqlite.Error as e:
+            logger.warning("Chunk summary cache write failed: %s", e)
+
+    async def _evict(self, db: aiosqlite.Connection):
+        """Delete oldest entries until the cache fits in max_bytes"""
+        cursor = await db.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM chunk_summaries")
+        total = (await cursor.fetchone())[0]
+        if total <= self.max_bytes:
+            return
+
+        cursor = await db.execute(
+            "SELECT key, size_bytes FROM chunk_summaries ORDER BY last_used_at ASC"
+        )
+        stale_keys = []
+        async for key, size in cursor:
+            if total <= self.max_bytes:
+                break
+            stale_keys.append(key)
+            total -= size
+        await cursor.close()
+        await db.executemany(
+            "DELETE FROM chunk_summaries WHERE key = ?",
+            [(key,) for key in stale_keys]
+        )
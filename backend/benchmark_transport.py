@@ -0,0 +1,134 @@
+"""
+Measure OpenAI map-call latency with and without hedged requests against a
+local mock server with a slow tail.
+
+Hedged duplicates need a free API slot, so the slot budget (--slots,
+like OPENAI_MAP_CONCURRENCY) should leave headroom above --concurrency.
+
+Usage:
+    python benchmark_transport.py [--requests 400] [--concurrency 8] [--slots 12] [--slow-ratio 0.03]
+"""
+import os
+import time
+import random
+import asyncio
+import argparse
+import threading
+
+import uvicorn
+from fastapi import FastAPI
+
+MOCK_HOST = "127.0.0.1"
+MOCK_PORT = 8765
+
+# Point the service at the mock server before settings are loaded
+os.environ.setdefault("OPENAI_API_KEY", "mock-key")
+os.environ["OPENAI_BASE_URL"] = f"http://{MOCK_HOST}:{MOCK_PORT}/v1"
+
+from app.services.openai_service import OpenAIService  # noqa: E402
+from app.services.llm_transport import MAP_CALL  # noqa: E402
+
+
+def create_mock_app(fast_seconds: float, slow_seconds: float, slow_ratio: float) -> FastAPI:
+    """Chat completions endpoint whose latency is usually fast, occasionally slow."""
+    mock_app = FastAPI()
+
+    @mock_app.post("/v1/chat/completions")
+    async def chat_completions():
+        slow = random.random() < slow_ratio
+        await asyncio.sleep(slow_seconds if slow else fast_seconds * random.uniform(0.5, 1.5))
+        return {
+            "id": "mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "mock",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "Mock chunk summary."}
+            }]
+        }
+
+    return mock_app
+
+
+def start_mock_server(mock_app: FastAPI) -> uvicorn.Server:
+    """Run the mock server in a background thread and wait until it accepts requests."""
+    server = uvicorn.Server(uvicorn.Config(mock_app, host=MOCK_HOST, port=MOCK_PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run_map_calls(hedge: bool, args) -> dict:
+    """Send map calls through OpenAIService and return latency percentiles and hedge counts."""
+    service = OpenAIService()
+    service.hedged_caller.hedge_enabled = hedge
+    service.hedged_caller.hedge_min_delay = args.hedge_min_delay
+    service.scheduler.capacity = args.slots
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one_call(num: int):
+        async with semaphore, service.scheduler.slot(1):
+            call_started = time.monotonic()
+            await service._generate_chunk_summary(f"Benchmark chunk {num}.", num)
+            latencies.append(time.monotonic() - call_started)
+
+    try:
+        # Warm up the pool and the latency window before measuring
+        await asyncio.gather(*(one_call(num) for num in range(args.warmup)))
+        latencies.clear()
+        hedges_before = service.metrics.counters[MAP_CALL]["hedges"]
+        wins_before = service.metrics.counters[MAP_CALL]["hedge_wins"]
+
+        started = time.monotonic()
+        await asyncio.gather(*(one_call(num) for num in range(args.requests)))
+        elapsed = time.monotonic() - started
+    finally:
+        await service.close()
+
+    latencies.sort()
+    counters = service.metrics.counters[MAP_CALL]
+    return {
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[int(len(latencies) * 0.95)],
+        "p99": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)],
+        "throughput": args.requests / elapsed,
+        "hedges": counters["hedges"] - hedges_before,
+        "hedge_wins": counters["hedge_wins"] - wins_before
+    }
+
+
+async def main(args):
+    results = {
+        "no hedging": await run_map_calls(False, args),
+        "hedging": await run_map_calls(True, args)
+    }
+    print(f"{'mode':<12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'hedges':>7} {'wins':>6}")
+    for mode, result in results.items():
+        print(
+            f"{mode:<12} {result['p50'] * 1000:>8.0f} {result['p95'] * 1000:>8.0f} "
+            f"{result['p99'] * 1000:>8.0f} {result['throughput']:>8.1f} "
+            f"{result['hedges']:>7} {result['hedge_wins']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400, help="Measured map calls per mode")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured calls to fill the latency window")
+    parser.add_argument("--concurrency", type=int, default=8, help="Map calls in flight at once")
+    parser.add_argument("--slots", type=int, default=12, help="API slot budget shared with hedged duplicates")
+    parser.add_argument("--fast-ms", type=float, default=50, help="Typical mock latency")
+    parser.add_argument("--slow-ms", type=float, default=2000, help="Tail mock latency")
+    parser.add_argument("--slow-ratio", type=float, default=0.03, help="Fraction of slow responses")
+    parser.add_argument("--hedge-min-delay", type=float, default=0.05, help="Lower bound for the hedge delay (seconds)")
+    args = parser.parse_args()
+
+    mock_server = start_mock_server(create_mock_app(args.fast_ms / 1000, args.slow_ms / 1000, args.slow_ratio))
+    try:
+        asyncio.run(main(args))
+    finally:
+        mock_server.should_exit = True
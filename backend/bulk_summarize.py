@@ -0,0 +1,59 @@
+"""
+Offline bulk summarization of archived PDFs via the OpenAI Batch API.
+
+Usage:
+    python bulk_summarize.py archive/ more/report.pdf [--poll-interval 60] [--resume]
+
+After an interruption, run the same command with --resume: files that were
+already summarized are skipped and batches that were already submitted are
+picked up instead of being submitted again.
+"""
+import argparse
+import asyncio
+import logging
+from pathlib import Path
+
+from app.core.dependencies import get_pdf_parser, get_openai_service, get_storage_service
+from app.services.batch_service import BatchSummaryService
+
+
+def collect_pdf_paths(inputs):
+    """Expand directories into the PDF files they contain."""
+    paths = []
+    for item in map(Path, inputs):
+        if item.is_dir():
+            paths.extend(sorted(item.rglob("*.pdf")))
+        elif item.suffix.lower() == ".pdf":
+            paths.append(item)
+    return paths
+
+
+async def main(args):
+    openai_service = get_openai_service()
+    service = BatchSummaryService(
+        pdf_parser=get_pdf_parser(),
+        openai_service=openai_service,
+        storage_service=await get_storage_service(),
+        poll_interval=args.poll_interval
+    )
+    try:
+        documents = await service.summarize_files(collect_pdf_paths(args.inputs), skip_summarized=args.resume)
+    finally:
+        await openai_service.close()
+    failed = 0
+    for document in documents:
+        if document.error:
+            failed += 1
+            print(f"{document.result_id}  FAILED  {document.path}  ({document.error})")
+        else:
+            print(f"{document.result_id}  ok      {document.path}")
+    print(f"{len(documents) - failed} summarized, {failed} failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize PDFs in bulk using the OpenAI Batch API")
+    parser.add_argument("inputs", nargs="+", help="PDF files or directories")
+    parser.add_argument("--poll-interval", type=float, default=None, help="Seconds between batch status checks")
+    parser.add_argument("--resume", action="store_true", help="Skip files already summarized by an earlier run")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    asyncio.run(main(parser.parse_args()))
@@ -1,17 +1,35 @@
 """Main FastAPI application entry point."""
+import time
+
+# Measured before importing the app so import time includes all service modules
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.dependencies import startup_state, warm_up_services, shutdown_services
 from app.api.routes import documents, health
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up services before serving traffic and release them on shutdown."""
+    await warm_up_services(started_at=_import_started)
+    yield
+    await shutdown_services()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="PDF Summary AI",
     version="1.0.0",
     description="API for uploading PDF documents and generating AI summaries",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -26,3 +44,5 @@ app.add_middleware(
 # Include routers
 app.include_router(health.router)
 app.include_router(documents.router)
+
+startup_state["import_seconds"] = round(time.perf_counter() - _import_started, 4)
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.core.exceptions import ServiceUnavailableError
+from app.services.admission import AdmissionController, client_identity
+
+PROXY = "10.0.0.5"
+
+
+def test_client_identity_only_trusts_forwarded_for_from_proxies():
+    # Direct clients cannot choose their identity
+    assert client_identity("203.0.113.7", "198.51.100.1", [PROXY]) == "203.0.113.7"
+    # Behind the proxy, the address the proxy appended is the client
+    assert client_identity(PROXY, "198.51.100.1", [PROXY]) == "198.51.100.1"
+    # A spoofed header value sent by the client is ignored
+    assert client_identity(PROXY, "1.2.3.4, 198.51.100.1", [PROXY]) == "198.51.100.1"
+    assert client_identity(PROXY, None, [PROXY]) == PROXY
+    assert client_identity(None, "198.51.100.1", [PROXY]) == "unknown"
+    # Networks can be trusted as a whole (e.g. a container network)
+    assert client_identity("172.18.0.3", "198.51.100.1", ["172.16.0.0/12"]) == "198.51.100.1"
+
+
+def test_queued_uploads_are_bounded_by_size():
+    async def scenario():
+        admission = AdmissionController(max_cost=10, max_queue=10, max_queued_mb=60, max_per_client=10)
+        release = asyncio.Event()
+
+        async def job(client_id: str, size_mb: float):
+            async with admission.admit(client_id, 10, size_mb=size_mb):
+                await release.wait()
+
+        running = asyncio.create_task(job("a", 40))
+        await asyncio.sleep(0)
+        # The first waiter is let in however large it is
+        first = asyncio.create_task(job("b", 50))
+        await asyncio.sleep(0)
+        assert admission.queued_mb == 50
+        assert admission.is_saturated(20)
+
+        with pytest.raises(ServiceUnavailableError):
+            await job("c", 20)
+        small = asyncio.create_task(job("d", 5))
+        await asyncio.sleep(0)
+        assert admission.queued_mb == 55
+
+        release.set()
+        await asyncio.gather(running, first, small)
+        assert admission.queued_mb == 0 and admission.in_flight_cost == 0
+
+    asyncio.run(scenario())
+
+
+def test_resize_grows_within_budget_and_waits_behind_queue():
+    async def scenario():
+        admission = AdmissionController(max_cost=10, max_queue=10, max_queued_mb=100, max_per_client=10)
+        release = asyncio.Event()
+
+        async with admission.admit("a", 2) as ticket:
+            # Growing while there is room takes the difference right away
+            await ticket.resize(6)
+            assert admission.in_flight_cost == 6
+            # Shrinking hands capacity back
+            await ticket.resize(3)
+            assert admission.in_flight_cost == 3
+
+            async def other():
+                async with admission.admit("b", 7):
+                    await release.wait()
+
+            holder = asyncio.create_task(other())
+            await asyncio.sleep(0)
+            assert admission.in_flight_cost == 10
+
+            # Growing past the budget gives back what is held and waits for the full cost
+            grown = asyncio.create_task(ticket.resize(8))
+            await asyncio.sleep(0)
+            assert not grown.done() and admission.in_flight_cost == 7
+            release.set()
+            await grown
+            await holder
+            assert ticket.cost == 8 and admission.in_flight_cost == 8
+        assert admission.in_flight_cost == 0
+
+    asyncio.run(scenario())
+
+
+def test_resize_is_capped_at_budget():
+    async def scenario():
+        admission = AdmissionController(max_cost=10, max_queue=10, max_per_client=10)
+        async with admission.admit("a", 1) as ticket:
+            await ticket.resize(50)
+            assert ticket.cost == 10 and admission.in_flight_cost == 10
+        assert admission.in_flight_cost == 0
+
+    asyncio.run(scenario())
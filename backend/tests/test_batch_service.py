@@ -0,0 +1,205 @@
+import json
+import asyncio
+import sqlite3
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request, UploadFile, File, Form
+from fastapi.responses import PlainTextResponse
+from openai import AsyncOpenAI
+
+from app.core.config import settings
+from app.services.batch_service import BatchSummaryService
+from app.services.storage import StorageService
+
+# Batches whose input contains this marker are reported as failed
+FAILING_MARKER = "poison"
+
+
+def create_mock_openai() -> FastAPI:
+    """Minimal local stand-in for the Files, Batches and chat completions endpoints."""
+    mock_app = FastAPI()
+    mock_app.state.files = {}
+    mock_app.state.batches = {}
+    mock_app.state.chat_calls = 0
+
+    def completion(content: str) -> dict:
+        return {
+            "id": "mock",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "mock",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}]
+        }
+
+    @mock_app.post("/v1/files")
+    async def create_file(file: UploadFile = File(...), purpose: str = Form(...)):
+        file_id = f"file-{len(mock_app.state.files)}"
+        mock_app.state.files[file_id] = (await file.read()).decode()
+        return {"id": file_id, "object": "file", "bytes": 0, "created_at": 0,
+                "filename": file.filename, "purpose": purpose, "status": "processed"}
+
+    @mock_app.post("/v1/batches")
+    async def create_batch(request: Request):
+        body = await request.json()
+        batch_id = f"batch-{len(mock_app.state.batches)}"
+        payload = mock_app.state.files[body["input_file_id"]]
+        batch = {"id": batch_id, "object": "batch", "endpoint": body["endpoint"],
+                 "input_file_id": body["input_file_id"], "completion_window": "24h",
+                 "created_at": 0, "status": "completed", "output_file_id": f"out-{batch_id}"}
+        if FAILING_MARKER in payload:
+            batch.update(status="failed", output_file_id=None)
+        else:
+            lines = []
+            for line in payload.splitlines():
+                request_line = json.loads(line)
+                lines.append(json.dumps({
+                    "id": "response",
+                    "custom_id": request_line["custom_id"],
+                    "response": {"status_code": 200, "body": completion(f"batch:{request_line['custom_id']}")}
+                }))
+            mock_app.state.files[f"out-{batch_id}"] = "\n".join(lines)
+        mock_app.state.batches[batch_id] = batch
+        return batch
+
+    @mock_app.get("/v1/batches/{batch_id}")
+    async def retrieve_batch(batch_id: str):
+        return mock_app.state.batches[batch_id]
+
+    @mock_app.get("/v1/files/{file_id}/content")
+    async def file_content(file_id: str):
+        return PlainTextResponse(mock_app.state.files[file_id])
+
+    @mock_app.post("/v1/chat/completions")
+    async def chat_completions():
+        mock_app.state.chat_calls += 1
+        return completion("direct")
+
+    return mock_app
+
+
+class FakeEncoding:
+    """Whitespace tokenizer (tiktoken data is not available offline)."""
+
+    @staticmethod
+    def encode(text):
+        return text.split()
+
+
+class TextParser:
+    """Treats file content as already extracted text."""
+
+    async def parse_pdf(self, pdf_bytes: bytes) -> str:
+        if pdf_bytes.startswith(b"%BROKEN"):
+            raise Exception("Error parsing PDF: broken file")
+        return pdf_bytes.decode()
+
+
+@pytest.fixture
+def openai_service(monkeypatch):
+    monkeypatch.setattr(settings, "openai_api_key", "test-key")
+    from app.services.openai_service import OpenAIService
+
+    mock_app = create_mock_openai()
+    service = OpenAIService()
+    service._encoding = FakeEncoding()
+    service.chunk_size_tokens, service.chunk_min_tokens, service.chunk_overlap_tokens = 50, 25, 5
+    service.client = AsyncOpenAI(
+        api_key="test-key",
+        base_url="http://mock/v1",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=mock_app))
+    )
+    service.mock_app = mock_app
+    return service
+
+
+def test_bulk_run_survives_bad_files_and_failed_batches(tmp_path, openai_service):
+    long_text = " ".join(f"Sentence number {i} has some words in it." for i in range(40))
+    files = {
+        "short.pdf": "Short document text that is long enough to be meaningful for the test run.",
+        "long.pdf": long_text,
+        "poison.pdf": f"A {FAILING_MARKER} document that is long enough to be meaningful for the test.",
+        "broken.pdf": "%BROKEN",
+    }
+    for number in range(6):
+        files[f"extra-{number}.pdf"] = f"Extra document {number} with enough text to be summarized in bulk mode."
+    paths = []
+    for name, content in files.items():
+        path = tmp_path / name
+        path.write_text(content)
+        paths.append(path)
+
+    db_path = str(tmp_path / "bulk.db")
+    storage = StorageService(db_path=db_path, storage_dir=str(tmp_path / "uploads"))
+    service = BatchSummaryService(TextParser(), openai_service, storage, poll_interval=0.01)
+    # One request per batch, so a failed batch only affects its own document
+    service.max_requests = 1
+
+    documents = asyncio.run(service.summarize_files(paths))
+    by_name = {document.path.name: document for document in documents}
+
+    assert by_name["broken.pdf"].error
+    assert by_name["short.pdf"].summary == "batch:doc-0-final"
+    assert by_name["long.pdf"].summary.startswith("batch:") and "reduce" in by_name["long.pdf"].summary
+    # The failed batch fell back to a regular call
+    assert by_name["poison.pdf"].summary == "direct"
+    assert openai_service.mock_app.state.chat_calls == 1
+
+    # Every file is recorded and nothing is trimmed to max_history
+    with sqlite3.connect(db_path) as db:
+        rows = db.execute("SELECT filename, summary, error FROM bulk_summaries").fetchall()
+    assert len(rows) == len(files) > settings.max_history
+    assert {row[0] for row in rows if row[2]} == {"broken.pdf"}
+
+
+def write_documents(tmp_path, count: int) -> list:
+    paths = []
+    for number in range(count):
+        path = tmp_path / f"doc-{number}.pdf"
+        path.write_text(f"Document {number} has enough text to be summarized in bulk mode by the batch service.")
+        paths.append(path)
+    return paths
+
+
+def test_batches_are_split_by_input_file_size(tmp_path, openai_service):
+    paths = write_documents(tmp_path, 6)
+    storage = StorageService(db_path=str(tmp_path / "bulk.db"), storage_dir=str(tmp_path / "uploads"))
+    service = BatchSummaryService(TextParser(), openai_service, storage, poll_interval=0.01)
+    # Room for two request lines per input file
+    request_bytes = len(json.dumps(service._build_request(
+        "doc-0-final", openai_service._document_summary_messages(paths[0].read_text()), 1000
+    )))
+    service.max_file_bytes = 2 * request_bytes + 10
+
+    documents = asyncio.run(service.summarize_files(paths))
+
+    inputs = [payload for file_id, payload in openai_service.mock_app.state.files.items() if file_id.startswith("file-")]
+    assert len(inputs) == len(openai_service.mock_app.state.batches) == 3
+    assert all(len(payload.encode()) <= service.max_file_bytes for payload in inputs)
+    assert all(document.summary.startswith("batch:") for document in documents)
+    assert openai_service.mock_app.state.chat_calls == 0
+
+
+def test_files_are_processed_in_groups_and_runs_resume(tmp_path, openai_service):
+    paths = write_documents(tmp_path, 7)
+    db_path = str(tmp_path / "bulk.db")
+    storage = StorageService(db_path=db_path, storage_dir=str(tmp_path / "uploads"))
+    service = BatchSummaryService(TextParser(), openai_service, storage, poll_interval=0.01)
+    service.group_size = 3
+
+    documents = asyncio.run(service.summarize_files(paths))
+
+    # One batch per group, and chunk text is released once a group is stored
+    assert len(openai_service.mock_app.state.batches) == 3
+    assert all(document.summary and not document.chunks for document in documents)
+
+    # Re-running the same files reuses the submitted batches instead of paying again
+    asyncio.run(service.summarize_files(paths))
+    assert len(openai_service.mock_app.state.batches) == 3
+
+    # Resuming skips files that were already summarized
+    assert asyncio.run(service.summarize_files(paths, skip_summarized=True)) == []
+    with sqlite3.connect(db_path) as db:
+        assert db.execute("SELECT COUNT(*) FROM bulk_summaries").fetchone()[0] == 14
+        assert db.execute("SELECT COUNT(*) FROM bulk_batches WHERE status = 'completed'").fetchone()[0] == 3
@@ -0,0 +1,39 @@
+from app.services.chunker import IncrementalChunker
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+def new_chunker() -> IncrementalChunker:
+    return IncrementalChunker(count_words, chunk_tokens=100, min_tokens=50, overlap_tokens=10)
+
+
+def test_feeding_piece_by_piece_matches_feeding_at_once():
+    text = " ".join(f"Sentence {i} is here... really! Is it? Yes." for i in range(200))
+
+    whole = new_chunker()
+    expected = whole.feed(text) + whole.finish()
+
+    pieces = new_chunker()
+    chunks = []
+    for start in range(0, len(text), 37):
+        chunks.extend(pieces.feed(text[start:start + 37]))
+    chunks.extend(pieces.finish())
+
+    assert len(expected) > 1
+    assert chunks == expected
+
+
+def test_text_without_terminators_is_split_while_streaming():
+    chunker = new_chunker()
+    words = [f"cell{i}" for i in range(1000)]
+
+    streamed = []
+    for start in range(0, len(words), 30):
+        streamed.extend(chunker.feed(" ".join(words[start:start + 30]) + " "))
+    final = chunker.finish()
+
+    assert len(streamed) >= 8
+    assert all(count_words(chunk) <= 100 for chunk in streamed + final)
+    assert " ".join(streamed + final).split() == words
@@ -0,0 +1,34 @@
+from app.services.extractive_summarizer import ExtractiveSummarizer
+
+UKRAINIAN_TEXT = (
+    "Київ є столицею України і найбільшим містом країни. "
+    "Місто розташоване на річці Дніпро в центральній частині держави. "
+    "У Києві працюють університети, театри та музеї світового рівня. "
+    "Населення Києва перевищує три мільйони людей за оцінками. "
+    "«Київська Русь» була середньовічною державою з центром у Києві."
+)
+
+
+def test_splits_and_ranks_cyrillic_text():
+    summarizer = ExtractiveSummarizer(summary_sentences=2, max_candidates=50)
+
+    sentences = summarizer._split_sentences(UKRAINIAN_TEXT)
+    summary = summarizer.summarize(UKRAINIAN_TEXT)
+
+    assert len(sentences) == 5
+    assert sentences[-1].startswith("«Київська Русь»")
+    assert summary and summary != UKRAINIAN_TEXT
+    assert all(sentence in sentences for sentence in summary.replace(". ", ".\n").splitlines())
+
+
+def test_lowercase_after_terminator_does_not_start_a_sentence():
+    summarizer = ExtractiveSummarizer(summary_sentences=2, max_candidates=50)
+
+    sentences = summarizer._split_sentences(
+        "The results are shown in Fig. three of the appendix below. Further work remains to be done here."
+    )
+
+    assert sentences == [
+        "The results are shown in Fig. three of the appendix below.",
+        "Further work remains to be done here."
+    ]
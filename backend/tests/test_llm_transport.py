@@ -0,0 +1,49 @@
+import asyncio
+
+from app.services.llm_transport import MAP_CALL, HedgedCaller, TransportMetrics
+from app.services.scheduler import JobScheduler
+
+
+def hedging_caller(scheduler: JobScheduler) -> HedgedCaller:
+    metrics = TransportMetrics()
+    # Enough fast samples for a hedge delay of hedge_min_delay
+    for _ in range(20):
+        metrics.latencies[MAP_CALL].record(0.001)
+    caller = HedgedCaller(metrics, hedge_enabled=True, scheduler=scheduler)
+    caller.hedge_min_samples, caller.hedge_min_delay = 20, 0.01
+    return caller
+
+
+def test_hedges_only_use_free_slots():
+    async def scenario():
+        scheduler = JobScheduler("api", 2, aging_per_second=0.2, small_job_cost=2)
+        caller = hedging_caller(scheduler)
+        in_flight = peak = 0
+
+        async def slow_send():
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                await asyncio.sleep(0.05)
+                return "done"
+            finally:
+                in_flight -= 1
+
+        async def one_call():
+            async with scheduler.slot(1):
+                return await caller.call(MAP_CALL, slow_send)
+
+        # One call alone has a spare slot to hedge with
+        assert await one_call() == "done"
+        assert caller.metrics.counters[MAP_CALL]["hedges"] == 1
+        assert scheduler.running == 0
+
+        # Two calls fill the budget, so neither may hedge
+        assert await asyncio.gather(one_call(), one_call()) == ["done", "done"]
+        assert caller.metrics.counters[MAP_CALL]["hedges"] == 1
+        assert caller.metrics.counters[MAP_CALL]["hedges_skipped"] == 2
+        assert peak <= scheduler.capacity
+        assert scheduler.running == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from openai import APIStatusError, AsyncOpenAI
+
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableError
+from app.services import openai_service as openai_service_module
+from app.services.resilience import CircuitBreaker
+
+MESSAGES = [{"role": "user", "content": "Summarize"}]
+
+
+def completion(content: str) -> dict:
+    return {
+        "id": "mock",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "mock",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}]
+    }
+
+
+class ScriptedAPI:
+    """Answers chat completions with queued error responses, then successes"""
+
+    def __init__(self, failures):
+        self.failures = list(failures)
+        self.requests = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.failures:
+            status_code, headers = self.failures.pop(0)
+            return httpx.Response(status_code, headers=headers, json={"error": {"message": "scripted"}})
+        return httpx.Response(200, json=completion("ok"))
+
+
+@pytest.fixture
+def make_service(monkeypatch):
+    monkeypatch.setattr(settings, "openai_api_key", "test-key")
+
+    def build(api: ScriptedAPI, **attributes):
+        service = openai_service_module.OpenAIService()
+        service.client = AsyncOpenAI(
+            api_key="test-key",
+            base_url="http://mock/v1",
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(api))
+        )
+        for name, value in attributes.items():
+            setattr(service, name, value)
+        return service
+
+    return build
+
+
+def test_backoff_grows_per_attempt(make_service, monkeypatch):
+    attempts = []
+    original = openai_service_module.backoff_delay
+
+    def recording_backoff(attempt, base_delay, max_delay):
+        attempts.append(attempt)
+        return original(attempt, base_delay, max_delay)
+
+    monkeypatch.setattr(openai_service_module, "backoff_delay", recording_backoff)
+    api = ScriptedAPI([(503, {})] * 3)
+    service = make_service(api, retry_base_delay=0.001, max_retries=5)
+
+    assert asyncio.run(service._create_completion(MESSAGES, 10)) == "ok"
+    assert attempts == [0, 1, 2]
+    assert api.requests == 4
+
+
+def test_retry_after_is_honoured(make_service):
+    api = ScriptedAPI([(429, {"retry-after": "0.3"})])
+    # Backoff alone would retry almost at once
+    service = make_service(api, retry_base_delay=0.001)
+
+    started = time.monotonic()
+    assert asyncio.run(service._create_completion(MESSAGES, 10)) == "ok"
+    assert time.monotonic() - started >= 0.3
+
+
+def test_rate_limit_burst_recovers_without_opening_the_breaker(make_service):
+    api = ScriptedAPI([(429, {"retry-after": "0.05"})] * 5)
+    service = make_service(api, circuit_breaker=CircuitBreaker(failure_threshold=3, reset_timeout=30))
+
+    async def scenario():
+        return await asyncio.gather(*(service._create_completion(MESSAGES, 10) for _ in range(4)))
+
+    assert asyncio.run(scenario()) == ["ok"] * 4
+    assert service.circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_server_errors_open_the_breaker(make_service):
+    api = ScriptedAPI([(503, {})] * 2)
+    service = make_service(api, max_retries=0, circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30))
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(APIStatusError):
+                await service._create_completion(MESSAGES, 10)
+        with pytest.raises(ServiceUnavailableError):
+            await service._create_completion(MESSAGES, 10)
+
+    asyncio.run(scenario())
+    assert api.requests == 2
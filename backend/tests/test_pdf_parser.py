@@ -0,0 +1,204 @@
+import pypdfium2
+
+from app.core.config import settings
+from app.services import pdf_parser as pdf_parser_module
+from app.services.pdf_parser import PDFParser
+from tests.pdf_samples import make_pdf
+
+
+def track_pdfium_documents(monkeypatch) -> list:
+    """Record every pypdfium2 document the parser opens"""
+    opened = []
+
+    class TrackedDocument(pypdfium2.PdfDocument):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.was_closed = False
+            opened.append(self)
+
+        def close(self):
+            self.was_closed = True
+            super().close()
+
+    monkeypatch.setattr(pdf_parser_module.pypdfium2, "PdfDocument", TrackedDocument)
+    return opened
+
+
+def test_ocr_closes_pdfium_document_even_when_stopped_early(monkeypatch):
+    opened = track_pdfium_documents(monkeypatch)
+    parser = PDFParser()
+    monkeypatch.setattr(parser, "_ocr_image", lambda image: "recognized text")
+    pdf = make_pdf([[f"page {number}"] for number in range(3)])
+
+    assert len(list(parser._ocr_pages(pdf))) == 3
+    pages = parser._ocr_pages(pdf)
+    next(pages)
+    pages.close()
+
+    assert len(opened) == 2 and all(document.was_closed for document in opened)
+
+
+def test_images_mode_closes_pdfium_document(monkeypatch):
+    opened = track_pdfium_documents(monkeypatch)
+    parser = PDFParser(ocr_mode="images")
+    pdf = make_pdf([["Some text on the only page of this document."]])
+
+    blocks = list(parser._iter_text_layer(pdf))
+
+    assert "Some text" in blocks[0]
+    assert len(opened) == 1 and opened[0].was_closed
+
+
+class FakePage:
+    """Stand-in for a pdfplumber page with only layout objects"""
+
+    def __init__(self, **objects):
+        self.objects = objects
+
+
+def test_table_gate_needs_ruling_geometry_for_line_strategies():
+    lines = PDFParser(table_strategy="lines")
+    assert not lines._may_contain_table(FakePage(char=[{}]))
+    assert lines._may_contain_table(FakePage(line=[{}]))
+    assert lines._may_contain_table(FakePage(rect=[{}]))
+    assert lines._may_contain_table(FakePage(curve=[{}]))
+
+    assert PDFParser(table_strategy="text")._may_contain_table(FakePage())
+    assert not PDFParser(table_strategy="none")._may_contain_table(FakePage(line=[{}]))
+
+
+TABLE = [
+    ["Name", None, "Score"],
+    ["  ", None, ""],
+    ["Ann  Lee", "", "9|10"],
+    [],
+    ["Bob", None],
+]
+
+
+def test_markdown_table_drops_empty_rows_and_columns():
+    formatted = PDFParser(table_format="markdown")._format_table(TABLE)
+
+    assert formatted.splitlines() == [
+        "| Name | Score |",
+        "|---|---|",
+        "| Ann Lee | 9\\|10 |",
+        "| Bob |  |",
+    ]
+
+
+def test_csv_table_drops_empty_rows_and_columns():
+    formatted = PDFParser(table_format="csv")._format_table(TABLE)
+
+    assert formatted.splitlines() == ["Name,Score", "Ann Lee,9|10", "Bob,"]
+    assert PDFParser(table_format="csv")._format_table([[" ", None]]) == ""
+
+
+class FakeRendered:
+    def __init__(self, label: str):
+        self.label = label
+
+    def to_pil(self):
+        return self.label
+
+
+class FakePdfiumPage:
+    """Records render calls; each rendered image is labelled by its crop box"""
+
+    def __init__(self):
+        self.renders = []
+
+    def render(self, scale, crop=(0, 0, 0, 0), grayscale=False):
+        self.renders.append({"scale": scale, "crop": crop})
+        return FakeRendered("page" if crop == (0, 0, 0, 0) else f"crop{len(self.renders)}")
+
+
+class FakeLayoutPage:
+    """Stand-in for a pdfplumber page with text lines and images (US Letter)"""
+
+    width, height = 612, 792
+
+    def __init__(self, lines=(), images=()):
+        self.lines = list(lines)
+        self.images = list(images)
+
+    def extract_text_lines(self):
+        return self.lines
+
+
+def image_at(x0, top, x1, bottom, source_width=None):
+    image = {"x0": x0, "top": top, "x1": x1, "bottom": bottom}
+    if source_width:
+        image["srcsize"] = (source_width, source_width)
+    return image
+
+
+def test_image_regions_are_cropped_in_pdfium_coordinates(monkeypatch):
+    parser = PDFParser()
+    monkeypatch.setattr(parser, "_ocr_image", lambda image: f"text of {image}")
+    pdfium_page = FakePdfiumPage()
+    # Extends past the right edge of the page; the crop is clamped to it
+    page = FakeLayoutPage(images=[image_at(72, 100, 700, 300)])
+
+    parser._extract_text_with_ocr(page, pdfium_page)
+
+    # pdfium crops are (left, bottom, right, top) margins from the page edges
+    assert pdfium_page.renders[0]["crop"] == (72, 792 - 300, 0, 100)
+
+
+def test_ocr_dpi_follows_source_resolution_within_bounds():
+    parser = PDFParser()
+    page = FakeLayoutPage()
+
+    # A 2 inch wide figure stored at 500 px wide is 250 DPI
+    assert parser._ocr_dpi(page, image_at(0, 0, 144, 144, 500), 144, 144) == 250
+    # Low-resolution images are upscaled, oversampled ones capped
+    assert parser._ocr_dpi(page, image_at(0, 0, 144, 144, 100), 144, 144) == settings.ocr_min_dpi
+    assert parser._ocr_dpi(page, image_at(0, 0, 144, 144, 2000), 144, 144) == settings.ocr_max_dpi
+    # A whole-page 600 DPI scan is rendered at the page DPI, not the region maximum
+    assert parser._ocr_dpi(page, image_at(0, 0, 612, 792, 5100), 612, 792) == settings.ocr_page_dpi
+    assert parser._ocr_dpi(page, image_at(0, 0, 144, 144), 144, 144) == settings.ocr_page_dpi
+
+
+def test_ocr_text_is_merged_with_text_lines_in_reading_order(monkeypatch):
+    parser = PDFParser()
+    labels = {"crop1": "figure one caption", "crop2": "", "crop3": "side figure"}
+    monkeypatch.setattr(parser, "_ocr_image", lambda image: labels[image])
+    page = FakeLayoutPage(
+        lines=[
+            {"top": 50.2, "x0": 72, "text": "Title"},
+            {"top": 400, "x0": 72, "text": "Closing paragraph"},
+        ],
+        images=[
+            image_at(72, 100, 300, 300),
+            # Blank region: contributes nothing
+            image_at(72, 320, 300, 380),
+            # Level with the title but to its right
+            image_at(320, 49.8, 540, 200),
+            # Icon-sized, skipped without rendering
+            image_at(500, 700, 520, 720),
+        ],
+    )
+    pdfium_page = FakePdfiumPage()
+
+    text = parser._extract_text_with_ocr(page, pdfium_page)
+
+    assert text.splitlines() == ["Title", "side figure", "figure one caption", "Closing paragraph"]
+    assert len(pdfium_page.renders) == 3
+
+
+def test_page_is_rendered_whole_when_image_regions_have_no_text(monkeypatch):
+    parser = PDFParser()
+    monkeypatch.setattr(parser, "_ocr_image", lambda image: "whole page text" if image == "page" else "")
+
+    # Only icon-sized images
+    icons = FakeLayoutPage(images=[image_at(10, 10, 30, 30)])
+    pdfium_page = FakePdfiumPage()
+    assert parser._ocr_page(icons, pdfium_page) == "whole page text"
+    assert pdfium_page.renders == [{"scale": settings.ocr_page_dpi / 72, "crop": (0, 0, 0, 0)}]
+
+    # Large images that OCR finds nothing in
+    blank = FakeLayoutPage(images=[image_at(72, 72, 540, 400)])
+    pdfium_page = FakePdfiumPage()
+    assert parser._ocr_page(blank, pdfium_page) == "whole page text"
+    assert len(pdfium_page.renders) == 2
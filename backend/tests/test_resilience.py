@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import resilience
+from app.services.resilience import CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock for the breaker."""
+    fake = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(resilience, "time", SimpleNamespace(monotonic=lambda: fake.now, time=lambda: fake.now))
+    return fake
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_opens_after_threshold(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+    open_breaker(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_half_open_allows_single_trial(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    open_breaker(breaker)
+    clock.now += 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_trial_success_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    open_breaker(breaker)
+    clock.now += 10
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.before_call() is False
+
+
+def test_trial_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    open_breaker(breaker)
+    clock.now += 10
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_cancelled_trial_frees_half_open(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    open_breaker(breaker)
+    clock.now += 10
+    is_trial = breaker.before_call()
+    breaker.record_cancelled(is_trial)
+    assert breaker.before_call() is True
+
+
+def test_cancelled_non_trial_keeps_trial_running(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    open_breaker(breaker)
+    clock.now += 10
+    breaker.before_call()
+    breaker.record_cancelled(False)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_create_completion_cancelled_during_trial(clock, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.openai_api_key", "test-key")
+    from app.services.openai_service import OpenAIService
+
+    async def scenario():
+        service = OpenAIService()
+        breaker = service.circuit_breaker
+        open_breaker(breaker)
+        clock.now += breaker.reset_timeout
+
+        started = asyncio.Event()
+
+        async def hang(call_type, send):
+            started.set()
+            await asyncio.sleep(3600)
+
+        service.hedged_caller.call = hang
+        task = asyncio.create_task(service._create_completion([], 10))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await service.close()
+        return breaker.before_call()
+
+    assert asyncio.run(scenario()) is True
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from app.services import scheduler as scheduler_module
+from app.services.scheduler import JobScheduler
+
+
+class FakeClock:
+    """Replaces the scheduler's time module so waiting can be simulated"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr(scheduler_module, "time", fake)
+    return fake
+
+
+async def settle():
+    """Let woken tasks run"""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_cheapest_waiting_job_is_served_first(clock):
+    async def scenario():
+        scheduler = JobScheduler("test", 1, aging_per_second=1.0, small_job_cost=10)
+        order = []
+
+        async def job(cost: float):
+            async with scheduler.slot(cost):
+                order.append(cost)
+
+        await scheduler.acquire(1)
+        tasks = [asyncio.create_task(job(cost)) for cost in (50, 5, 20, 5)]
+        await settle()
+        assert order == [] and scheduler.snapshot()["queued"] == 4
+
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        # Equal costs keep their arrival order
+        return order, scheduler
+
+    order, scheduler = asyncio.run(scenario())
+
+    assert order == [5, 5, 20, 50]
+    assert scheduler.running == 0
+    assert scheduler.acquired == {"small": 3, "large": 2}
+
+
+def admitted_order(clock: FakeClock, aging_per_second: float, steps: int = 30) -> list:
+    """Run a large job against one small arrival per second; each second one job finishes"""
+
+    async def scenario():
+        scheduler = JobScheduler("test", 1, aging_per_second=aging_per_second, small_job_cost=10)
+        order = []
+
+        async def job(name: str, cost: float):
+            await scheduler.acquire(cost)
+            order.append(name)
+
+        await scheduler.acquire(1)
+        tasks = [asyncio.create_task(job("large", 100))]
+        await settle()
+        for second in range(1, steps + 1):
+            clock.now = second
+            tasks.append(asyncio.create_task(job(f"small {second}", 1)))
+            await settle()
+            scheduler.release()
+            await settle()
+            if "large" in order:
+                # Small jobs were still arriving and waiting when it got in
+                assert scheduler.snapshot()["queued"] >= 1
+                break
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return order
+
+    return asyncio.run(scenario())
+
+
+def test_aging_admits_a_large_job_amid_small_arrivals(clock):
+    # Priority of a job is its cost minus aging * seconds waited:
+    # the large job overtakes new small ones once it has waited ~10 seconds
+    order = admitted_order(clock, aging_per_second=10)
+    assert order[-1] == "large"
+    assert len(order) == 10
+
+
+def test_large_job_starves_without_aging(clock):
+    assert "large" not in admitted_order(clock, aging_per_second=0)
+
+
+def test_cancelled_waiter_does_not_leak_a_slot(clock):
+    async def scenario():
+        scheduler = JobScheduler("test", 1, aging_per_second=1.0, small_job_cost=10)
+
+        # Cancelled while still queued
+        await scheduler.acquire(1)
+        waiting = asyncio.create_task(scheduler.acquire(5))
+        await settle()
+        waiting.cancel()
+        await settle()
+        scheduler.release()
+        assert scheduler.running == 0 and scheduler.snapshot()["queued"] == 0
+
+        # Cancelled just after being granted the slot, before it could run
+        await scheduler.acquire(1)
+        granted = asyncio.create_task(scheduler.acquire(5))
+        await settle()
+        scheduler.release()
+        assert scheduler.running == 1
+        granted.cancel()
+        await settle()
+        assert granted.cancelled()
+        assert scheduler.running == 0
+
+        # The slot is still usable
+        assert scheduler.try_acquire()
+        scheduler.release()
+        await asyncio.wait_for(scheduler.acquire(5), timeout=1)
+        scheduler.release()
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+
+    assert scheduler.running == 0
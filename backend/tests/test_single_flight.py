@@ -0,0 +1,135 @@
+import asyncio
+import sqlite3
+import time
+
+import aiosqlite
+import pytest
+
+from app.services.single_flight import SingleFlightService
+
+
+def new_service(db_path, **kwargs) -> SingleFlightService:
+    kwargs.setdefault("poll_interval", 0.01)
+    return SingleFlightService(db_path=str(db_path), **kwargs)
+
+
+def test_concurrent_callers_in_a_worker_share_one_run(tmp_path):
+    service = new_service(tmp_path / "flight.db")
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "summary"
+
+    async def scenario():
+        return await asyncio.gather(*(service.run("doc", compute) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["summary"] * 5
+    assert calls == 1
+
+
+def test_second_worker_waits_for_the_leader(tmp_path):
+    leader = new_service(tmp_path / "flight.db")
+    follower = new_service(tmp_path / "flight.db")
+    calls = []
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def lead():
+            calls.append("leader")
+            started.set()
+            await asyncio.sleep(0.1)
+            return "from leader"
+
+        async def follow():
+            calls.append("follower")
+            return "from follower"
+
+        leading = asyncio.create_task(leader.run("doc", lead))
+        await started.wait()
+        return await asyncio.gather(leading, follower.run("doc", follow))
+
+    assert asyncio.run(scenario()) == ["from leader", "from leader"]
+    assert calls == ["leader"]
+
+
+def test_lock_of_a_crashed_worker_expires(tmp_path):
+    db_path = tmp_path / "flight.db"
+    service = new_service(db_path, lock_ttl=30)
+    owners = []
+
+    async def compute():
+        with sqlite3.connect(db_path) as db:
+            owners.extend(row[0] for row in db.execute("SELECT owner FROM inflight_locks WHERE key = 'doc'"))
+        return "recomputed"
+
+    async def scenario():
+        await service.initialize()
+        with sqlite3.connect(db_path) as db:
+            db.execute(
+                "INSERT INTO inflight_locks (key, owner, acquired_at) VALUES (?, ?, ?)",
+                ("doc", "crashed-worker", time.time() - 60)
+            )
+        return await asyncio.wait_for(service.run("doc", compute), timeout=5)
+
+    assert asyncio.run(scenario()) == "recomputed"
+    # The stale lock was taken over instead of waited out
+    assert owners == [service.owner]
+
+
+def test_failed_leader_releases_the_lock(tmp_path):
+    leader = new_service(tmp_path / "flight.db")
+    follower = new_service(tmp_path / "flight.db")
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def fail():
+            started.set()
+            await asyncio.sleep(0.05)
+            raise RuntimeError("parse failed")
+
+        async def compute():
+            return "follower result"
+
+        leading = asyncio.create_task(leader.run("doc", fail))
+        await started.wait()
+        following = asyncio.create_task(follower.run("doc", compute))
+        with pytest.raises(RuntimeError):
+            await leading
+        return await asyncio.wait_for(following, timeout=5)
+
+    assert asyncio.run(scenario()) == "follower result"
+
+
+def test_database_errors_fall_back_to_computing(tmp_path, monkeypatch):
+    service = new_service(tmp_path / "flight.db")
+
+    async def locked(*args):
+        raise aiosqlite.OperationalError("database is locked")
+
+    monkeypatch.setattr(service, "_get_result", locked)
+
+    async def compute():
+        return "computed"
+
+    assert asyncio.run(service.run("doc", compute)) == "computed"
+
+
+def test_unshareable_results_are_not_published(tmp_path):
+    service = new_service(tmp_path / "flight.db")
+    results = iter(["degraded", "full"])
+
+    async def compute():
+        return next(results)
+
+    async def scenario():
+        first = await service.run("doc", compute, shareable=lambda result: result != "degraded")
+        second = await service.run("doc", compute, shareable=lambda result: result != "degraded")
+        third = await service.run("doc", compute)
+        return first, second, third
+
+    assert asyncio.run(scenario()) == ("degraded", "full", "full")
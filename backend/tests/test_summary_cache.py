@@ -0,0 +1,35 @@
+import asyncio
+
+from app.services.summary_cache import SummaryCache, normalize_chunk_text
+
+
+def test_make_key_ignores_page_markers_and_whitespace():
+    first = SummaryCache.make_key("--- Page 1 ---\nSome  text here.", "model", "2")
+    second = SummaryCache.make_key("--- Page 7 ---\nSome text\nhere.", "model", "2")
+    assert first == second
+    assert normalize_chunk_text("--- Page 3 ---\na   b") == "a b"
+
+
+def test_make_key_depends_on_prompt_version():
+    assert SummaryCache.make_key("text", "model", "1") != SummaryCache.make_key("text", "model", "2")
+
+
+def test_round_trip(tmp_path):
+    cache = SummaryCache(db_path=str(tmp_path / "cache.db"))
+
+    async def scenario():
+        await cache.put("key", "summary")
+        return await cache.get_many(["key", "missing"])
+
+    assert asyncio.run(scenario()) == {"key": "summary"}
+
+
+def test_database_errors_are_misses(tmp_path):
+    # A directory can't be opened as a database
+    cache = SummaryCache(db_path=str(tmp_path))
+
+    async def scenario():
+        await cache.put("key", "summary")
+        return await cache.get_many(["key"])
+
+    assert asyncio.run(scenario()) == {}
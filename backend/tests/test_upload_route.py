@@ -0,0 +1,168 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.routes import documents
+from app.core import dependencies
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableError
+from app.services.admission import AdmissionController
+from app.services.extractive_summarizer import ExtractiveSummarizer
+from app.services.pdf_parser import PDFParser
+from app.services.scheduler import JobScheduler
+from app.services.single_flight import SingleFlightService
+from app.services.storage import StorageService
+from tests.pdf_samples import make_pdf
+
+
+def make_document(seed: int, pages: int = 4) -> bytes:
+    return make_pdf([
+        [f"Document {seed} page {page} line {line} talks about topic {line % 7}." for line in range(20)]
+        for page in range(pages)
+    ])
+
+
+class CountingParser(PDFParser):
+    """PDF parser that counts how often a document is parsed"""
+
+    def __init__(self):
+        super().__init__()
+        self.parses = 0
+
+    def iter_pages(self, pdf_bytes: bytes):
+        self.parses += 1
+        return super().iter_pages(pdf_bytes)
+
+
+class UnavailableOpenAI:
+    """Reads a few streamed pages, then fails like an OpenAI outage"""
+
+    async def generate_summary_stream(self, parts, max_length=None, job_cost=None):
+        async for _ in parts:
+            break
+        raise ServiceUnavailableError("OpenAI API is unavailable (status 503). Please try again later.")
+
+
+class StreamingOpenAI:
+    """Reads the whole page stream and returns a fixed summary"""
+
+    async def generate_summary_stream(self, parts, max_length=None, job_cost=None):
+        async for _ in parts:
+            await asyncio.sleep(0)
+        return "LLM summary"
+
+
+@pytest.fixture
+def upload_app(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "extractive_prepass_ratio", 0.0)
+    monkeypatch.setattr(settings, "extractive_fallback_enabled", True)
+    storage = StorageService(db_path=str(tmp_path / "documents.db"), storage_dir=str(tmp_path / "uploads"))
+    single_flight = SingleFlightService(db_path=str(tmp_path / "documents.db"))
+
+    async def get_storage():
+        await storage.initialize()
+        return storage
+
+    async def get_single_flight():
+        await single_flight.initialize()
+        return single_flight
+
+    app = FastAPI()
+    app.include_router(documents.router)
+    app.state.parser = CountingParser()
+    app.state.cpu_scheduler = JobScheduler("cpu", 2, aging_per_second=2.0, small_job_cost=10)
+    app.dependency_overrides = {
+        dependencies.get_pdf_parser: lambda: app.state.parser,
+        dependencies.get_optional_openai_service: lambda: app.state.openai,
+        dependencies.get_extractive_summarizer: lambda: ExtractiveSummarizer(summary_sentences=3),
+        dependencies.get_storage_service: get_storage,
+        dependencies.get_single_flight_service: get_single_flight,
+        dependencies.get_admission_controller: lambda: AdmissionController(max_cost=10000, max_queue=100, max_per_client=100),
+        dependencies.get_cpu_scheduler: lambda: app.state.cpu_scheduler,
+    }
+    return app
+
+
+async def upload(client: httpx.AsyncClient, content: bytes, mode: str = "llm") -> httpx.Response:
+    return await client.post(
+        f"/api/v1/upload?mode={mode}",
+        files={"file": ("document.pdf", content, "application/pdf")}
+    )
+
+
+def test_fallback_reuses_streamed_pages(upload_app):
+    upload_app.state.openai = UnavailableOpenAI()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=upload_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await upload(client, make_document(1))
+
+    response = asyncio.run(scenario())
+
+    assert response.status_code == 201
+    assert response.json()["summary_mode"] == "extractive"
+    assert "Document 1" in response.json()["summary"]
+    assert upload_app.state.parser.parses == 1
+
+
+def test_fallback_parses_again_past_the_kept_text_cap(upload_app, monkeypatch):
+    monkeypatch.setattr(settings, "extractive_fallback_max_chars", 500)
+    upload_app.state.openai = UnavailableOpenAI()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=upload_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await upload(client, make_document(3))
+
+    response = asyncio.run(scenario())
+
+    assert response.status_code == 201
+    assert response.json()["summary_mode"] == "extractive"
+    assert "Document 3" in response.json()["summary"]
+    assert upload_app.state.parser.parses == 2
+
+
+def test_mixed_streamed_and_extractive_burst_completes(upload_app):
+    upload_app.state.openai = StreamingOpenAI()
+    upload_app.state.cpu_scheduler = JobScheduler("cpu", 1, aging_per_second=2.0, small_job_cost=10)
+
+    async def scenario():
+        # Fewer worker threads than concurrent uploads, as under a real burst
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=2))
+        transport = httpx.ASGITransport(app=upload_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            uploads = [
+                upload(client, make_document(seed, pages=3), mode="extractive" if seed % 2 else "llm")
+                for seed in range(8)
+            ]
+            return await asyncio.wait_for(asyncio.gather(*uploads), timeout=30)
+
+    responses = asyncio.run(scenario())
+
+    assert [response.status_code for response in responses] == [201] * 8
+    assert [response.json()["summary_mode"] for response in responses] == ["llm", "extractive"] * 4
+    assert upload_app.state.cpu_scheduler.running == 0
+
+
+def test_fallback_summary_is_not_reused_after_recovery(upload_app):
+    document = make_document(2)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=upload_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            upload_app.state.openai = UnavailableOpenAI()
+            degraded = await upload(client, document)
+            upload_app.state.openai = StreamingOpenAI()
+            recovered = await upload(client, document)
+            return degraded, recovered
+
+    degraded, recovered = asyncio.run(scenario())
+
+    assert degraded.json()["summary_mode"] == "extractive"
+    assert recovered.json() | {"uploaded_at": None} == {
+        "filename": "document.pdf", "summary": "LLM summary", "summary_mode": "llm", "uploaded_at": None
+    }
@@ -102,6 +102,11 @@ export default function FileUpload({ onUploadSuccess }: FileUploadProps) {
           <h3 className="font-semibold text-green-800 dark:text-green-300 mb-2">
             Summary for {result.filename}
           </h3>
+          {result.summary_mode === 'extractive' && (
+            <p className="text-sm text-green-600 dark:text-green-500 mb-2">
+              Extractive summary (key sentences from the document, not AI-generated)
+            </p>
+          )}
           <p className="text-green-700 dark:text-green-400 whitespace-pre-wrap">
             {result.summary}
           </p>
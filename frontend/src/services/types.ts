@@ -2,9 +2,13 @@
  * Type definitions for API responses and entities.
  */
 
+/** Engine that produced a summary: OpenAI or the local extractive fallback */
+export type SummaryMode = 'llm' | 'extractive';
+
 export interface SummaryResponse {
   filename: string;
   summary: string;
+  summary_mode: SummaryMode;
   uploaded_at: string;
 }
 
@@ -12,6 +16,7 @@ export interface HistoryItem {
   id: string;
   filename: string;
   summary: string;
+  summary_mode: SummaryMode;
   uploaded_at: string;
   file_size_mb: number;
 }